@@ -0,0 +1,257 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import sys
+import json
+import time
+import copy
+import asyncio
+import argparse
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paypay import PayPay, AsyncPayPay, Transport, HTTP2Transport, AsyncTransport, MetricsCollector
+from paypay.endpoints import APP_URL, WEB_URL
+from benchmarks.fake_server import FakeServer
+
+PAYPAY_VERSION = "5.0.0"
+LOGIN_URL = "https://www.paypay.ne.jp/portal/oauth2/l?id=bench"
+METHODS = ("login_start", "login_confirm", "login_refresh", "get_balance", "get_history", "iter_history", "get_profile", "get_p2p_code", "get_link", "create_link", "accept_link", "reject_link")
+
+def rewrite(request, base_url: str):
+    request = copy.copy(request)
+    for url in (APP_URL, WEB_URL):
+        if request.url.startswith(url):
+            request.url = base_url + request.url[len(url):]
+            break
+    return request
+
+class LocalTransport(Transport):
+    def __init__(self, base_url: str, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def _send(self, session, request, proxies: dict, policy):
+        return super()._send(session, rewrite(request, self.base_url), proxies, policy)
+
+    def prewarm(self, session, hosts: tuple = None, connections: int = 1, proxies: dict = None) -> None:
+        super().prewarm(session, (self.base_url,), connections, proxies)
+
+class LocalHTTP2Transport(HTTP2Transport):
+    def __init__(self, base_url: str, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def _send(self, session, request, proxies: dict, policy):
+        return super()._send(session, rewrite(request, self.base_url), proxies, policy)
+
+    def prewarm(self, session, hosts: tuple = None, connections: int = 1, proxies: dict = None) -> None:
+        super().prewarm(session, (self.base_url,), connections, proxies)
+
+class LocalAsyncTransport(AsyncTransport):
+    def __init__(self, base_url: str, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    async def _send(self, session, request, policy):
+        return await super()._send(session, rewrite(request, self.base_url), policy)
+
+    async def prewarm(self, session, hosts: tuple = None, connections: int = 1) -> None:
+        await super().prewarm(session, (self.base_url,), connections)
+
+def percentile(values: list, rate: float) -> float:
+    if len(values) == 0:
+        return 0
+    return values[min(len(values) - 1, int(len(values) * rate))]
+
+def summarize(method: str, mode: str, concurrency: int, latencies: list, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "method": method,
+        "mode": mode,
+        "concurrency": concurrency,
+        "ops": len(latencies),
+        "errors": errors,
+        "ops_per_sec": len(latencies) / elapsed if elapsed > 0 else 0,
+        "p50": percentile(latencies, 0.5) * 1000,
+        "p90": percentile(latencies, 0.9) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000
+    }
+
+def setup(paypay, method: str) -> None:
+    if method == "login_confirm":
+        paypay.login_start("08012345678", "password")
+
+def operation(paypay, method: str):
+    if method == "login_start":
+        return paypay.login_start("08012345678", "password")
+    elif method == "login_confirm":
+        return paypay.login_confirm(LOGIN_URL)
+    elif method == "login_refresh":
+        return paypay.login_refresh("bench")
+    elif method == "get_history":
+        return paypay.get_history(size=20)
+    elif method == "iter_history":
+        items = paypay.iter_history(size=20)
+        if hasattr(items, "__aiter__"):
+            return count_async(items)
+        return sum(1 for _ in items)
+    elif method == "get_link":
+        return paypay.get_link("bench")
+    elif method == "create_link":
+        return paypay.create_link(amount=1)
+    elif method in ("accept_link", "reject_link"):
+        return getattr(paypay, method)("bench")
+    return getattr(paypay, method)()
+
+async def count_async(items) -> int:
+    count = 0
+    async for _ in items:
+        count += 1
+    return count
+
+def run_sync(base_url: str, method: str, concurrency: int, iterations: int, hooks: list = None, http2: bool = False) -> dict:
+    if http2:
+        transport = LocalHTTP2Transport(base_url, max_connections=concurrency, max_keepalive_connections=concurrency, hooks=hooks)
+    else:
+        transport = LocalTransport(base_url, pool_connections=2, pool_maxsize=concurrency, hooks=hooks)
+    clients = [PayPay(access_token="bench", paypay_version=PAYPAY_VERSION, transport=transport, auto_refresh=False) for _ in range(concurrency)]
+    clients[0].prewarm(connections=concurrency)
+
+    lock = threading.Lock()
+    latencies = []
+    errors = 0
+    remaining = [iterations]
+
+    def worker(paypay) -> None:
+        nonlocal errors
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            setup(paypay, method)
+            start = time.perf_counter()
+            try:
+                operation(paypay, method)
+            except Exception:
+                with lock:
+                    errors += 1
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, clients))
+    elapsed = time.perf_counter() - start
+
+    transport.close()
+    return summarize(method, "sync", concurrency, latencies, errors, elapsed)
+
+async def run_async(base_url: str, method: str, concurrency: int, iterations: int, hooks: list = None, http2: bool = False) -> dict:
+    transport = LocalAsyncTransport(base_url, max_connections=concurrency, max_keepalive_connections=concurrency, hooks=hooks, http2=http2)
+    clients = [AsyncPayPay(access_token="bench", paypay_version=PAYPAY_VERSION, transport=transport, auto_refresh=False) for _ in range(concurrency)]
+    await clients[0].prewarm(connections=concurrency)
+
+    latencies = []
+    errors = 0
+    remaining = [iterations]
+
+    async def worker(paypay) -> None:
+        nonlocal errors
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            if method == "login_confirm":
+                await paypay.login_start("08012345678", "password")
+            start = time.perf_counter()
+            try:
+                await operation(paypay, method)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(paypay) for paypay in clients])
+    elapsed = time.perf_counter() - start
+
+    await transport.aclose()
+    return summarize(method, "async", concurrency, latencies, errors, elapsed)
+
+def print_table(results: list) -> None:
+    print(f"{'method':<14} {'mode':<6} {'conc':>5} {'ops':>6} {'err':>4} {'ops/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+    for result in results:
+        print(f"{result['method']:<14} {result['mode']:<6} {result['concurrency']:>5} {result['ops']:>6} {result['errors']:>4} {result['ops_per_sec']:>9.1f} {result['p50']:>8.2f} {result['p90']:>8.2f} {result['p99']:>8.2f}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ローカルの模擬サーバーに対してpaypay.pyのスループットとレイテンシを計測します")
+    parser.add_argument("--methods", default=",".join(METHODS), help="計測するメソッド(カンマ区切り)")
+    parser.add_argument("--concurrency", default="1,8,32", help="同時実行数(カンマ区切り)")
+    parser.add_argument("--iterations", type=int, default=200, help="1回の計測で実行するリクエスト数")
+    parser.add_argument("--latency", type=float, default=0, help="模擬サーバーの応答遅延(ミリ秒)")
+    parser.add_argument("--history-pages", type=int, default=5, help="iter_historyがたどる取引履歴のページ数")
+    parser.add_argument("--mode", choices=("sync", "async", "both"), default="sync")
+    parser.add_argument("--server", default=None, help="起動済みの模擬サーバーのURL")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    parser.add_argument("--metrics", action="store_true", help="MetricsCollectorを有効にし、Prometheus形式のメトリクスを出力")
+    parser.add_argument("--http2", action="store_true", help="httpxのHTTP/2トランスポートを使う(サーバーが対応していない場合はHTTP/1.1)")
+    args = parser.parse_args()
+
+    collector = MetricsCollector() if args.metrics else None
+    hooks = [collector] if collector != None else None
+
+    server = None
+    base_url = args.server
+    if base_url == None:
+        server = FakeServer(latency=args.latency / 1000, history_pages=args.history_pages).start()
+        base_url = server.url
+
+    results = []
+    try:
+        for method in args.methods.split(","):
+            for concurrency in [int(value) for value in args.concurrency.split(",")]:
+                if args.mode in ("sync", "both"):
+                    results.append(run_sync(base_url, method, concurrency, args.iterations, hooks, args.http2))
+                if args.mode in ("async", "both"):
+                    results.append(asyncio.run(run_async(base_url, method, concurrency, args.iterations, hooks, args.http2)))
+    finally:
+        if server != None:
+            server.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        print_table(results)
+
+    if collector != None:
+        print(collector.export(), end="")
+
+if __name__ == "__main__":
+    main()
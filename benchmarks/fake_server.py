@@ -0,0 +1,215 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import time
+import uuid
+import argparse
+import threading
+import urllib.parse
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+HISTORY_CURSOR = "lastEvaluatedKey"
+
+def ok(payload = None) -> dict:
+    response = {
+        "header": {
+            "resultCode": "S0000",
+            "resultMessage": ""
+        }
+    }
+    if payload != None:
+        response["payload"] = payload
+    return response
+
+def link_info() -> dict:
+    return ok({
+        "orderStatus": "PENDING",
+        "pendingP2PInfo": {
+            "amount": 100,
+            "isSetPasscode": False
+        },
+        "sender": {
+            "displayName": "bench",
+            "photoUrl": "https://example.com/icon.png"
+        },
+        "message": {
+            "chatRoomId": "sendbird_group_channel_bench",
+            "messageId": "1",
+            "data": {
+                "orderId": "00000000000000000000"
+            }
+        }
+    })
+
+def history(size: int, cursor: str = None, pages: int = 1) -> dict:
+    page = int(cursor) if cursor else 0
+    return ok({
+        "paymentInfoList": [
+            {
+                "orderId": str(10 ** 19 + page * size + index),
+                "orderType": "P2P_RECEIVE",
+                "orderStatus": "COMPLETED",
+                "amount": 100 + index,
+                "description": f"user {index}",
+                "imageUrl": "https://example.com/icon.png",
+                "transactionAt": "2024-01-01T00:00:00Z"
+            }
+            for index in range(size)
+        ],
+        HISTORY_CURSOR: str(page + 1) if page + 1 < pages else None
+    })
+
+def token() -> dict:
+    return ok({
+        "accessToken": str(uuid.uuid4()),
+        "refreshToken": str(uuid.uuid4()),
+        "expiresIn": 3600
+    })
+
+ROUTES = {
+    ("POST", "/bff/v2/oauth2/par"): lambda query, server: ok({"requestUri": "urn:ietf:params:oauth:request_uri:bench"}),
+    ("GET", "/portal/api/v2/oauth2/par/check"): lambda query, server: ok({}),
+    ("POST", "/portal/api/v2/oauth2/sign-in/password"): lambda query, server: ok({}),
+    ("POST", "/portal/api/v2/oauth2/extension/code-grant/update"): lambda query, server: ok({
+        "request": {"extension_id": "bench"},
+        "redirect_uri": "paypay://oauth2/callback?code=bench"
+    }),
+    ("POST", "/portal/api/v2/oauth2/extension/sign-in/2fa/otl/verify"): lambda query, server: ok({"otlCode": "bench", "otp": "000000"}),
+    ("POST", "/bff/v2/oauth2/token"): lambda query, server: token(),
+    ("POST", "/bff/v2/oauth2/refresh"): lambda query, server: token(),
+    ("POST", "/bff/v1/signOut"): lambda query, server: ok({}),
+    ("GET", "/bff/v1/getBalanceInfo"): lambda query, server: ok({
+        "walletSummary": {
+            "allTotalBalanceInfo": {"balance": 1000},
+            "usableBalanceInfoWithoutCashback": {"balance": 900}
+        },
+        "walletDetail": {
+            "emoneyBalanceInfo": {"balance": 800},
+            "prepaidBalanceInfo": {"balance": 100},
+            "cashBackBalanceInfo": {"balance": 100}
+        }
+    }),
+    ("GET", "/bff/v3/getPaymentHistory"): lambda query, server: history(int(query.get("pageSize", "20")), query.get(HISTORY_CURSOR), server.history_pages),
+    ("GET", "/bff/v2/getProfileDisplayInfo"): lambda query, server: ok({
+        "userProfile": {
+            "nickName": "bench",
+            "externalUserId": "bench",
+            "avatarImageUrl": "https://example.com/icon.png"
+        }
+    }),
+    ("POST", "/bff/v1/createP2PCode"): lambda query, server: ok({"p2pCode": "https://qr.paypay.ne.jp/p2p01_bench"}),
+    ("GET", "/bff/v2/getP2PLinkInfo"): lambda query, server: link_info(),
+    ("POST", "/bff/v2/executeP2PSendMoneyLink"): lambda query, server: ok({"link": "https://pay.paypay.ne.jp/bench", "orderId": "1"}),
+    ("POST", "/bff/v2/acceptP2PSendMoneyLink"): lambda query, server: ok({"orderStatus": "COMPLETED"}),
+    ("POST", "/bff/v2/rejectP2PSendMoneyLink"): lambda query, server: ok({"orderStatus": "REJECTED"})
+}
+
+PAGES = ("/portal/api/v2/oauth2/authorize", "/portal/oauth2/extension-select-otp")
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self.handle_request()
+
+    def do_POST(self) -> None:
+        self.handle_request()
+
+    def do_HEAD(self) -> None:
+        self.send_body(b"", "text/html")
+
+    def handle_request(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        url = urllib.parse.urlsplit(self.path)
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+
+        if url.path in PAGES:
+            self.send_body(b"<html></html>", "text/html", cookies=["Lang=ja; Path=/", "__Secure-request_uri=bench; Path=/"])
+            return
+
+        route = ROUTES.get((self.command, url.path))
+        if route == None:
+            self.send_body(json.dumps({"header": {"resultCode": "E0404", "resultMessage": "not found"}}).encode(), "application/json", status=404)
+            return
+
+        self.send_body(json.dumps(route(dict(urllib.parse.parse_qsl(url.query)), self.server)).encode(), "application/json")
+
+    def send_body(self, body: bytes, content_type: str, status: int = 200, cookies: list = ()) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for cookie in cookies:
+            self.send_header("Set-Cookie", cookie)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0, history_pages: int = 5) -> None:
+        super().__init__((host, port), Handler)
+        self.latency = latency
+        self.history_pages = history_pages
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def start(self) -> "FakeServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="PayPayのBFF/OAuthエンドポイントを模したローカルサーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0, help="応答までの遅延(ミリ秒)")
+    parser.add_argument("--history-pages", type=int, default=5, help="取引履歴のページ数(lastEvaluatedKeyで次のページを返す)")
+    args = parser.parse_args()
+
+    server = FakeServer(args.host, args.port, args.latency / 1000, args.history_pages)
+    print(f"listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
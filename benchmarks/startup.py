@@ -0,0 +1,111 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LAZY_MODULES = ("bs4", "pkce", "httpx", "msgspec")
+IMPORT_SCRIPT = f"""
+import sys, time, json
+start = time.perf_counter()
+import paypay
+imported = time.perf_counter()
+client = paypay.PayPay(paypay_version="5.0.0")
+created = time.perf_counter()
+print(json.dumps({{
+    "import": imported - start,
+    "create": created - imported,
+    "loaded": [name for name in {LAZY_MODULES!r} if name in sys.modules]
+}}))
+"""
+
+def measure_startup(runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output))
+
+    return {
+        "import_ms": statistics.median(sample["import"] for sample in samples) * 1000,
+        "create_ms": statistics.median(sample["create"] for sample in samples) * 1000,
+        "loaded": sorted(set(name for sample in samples for name in sample["loaded"]))
+    }
+
+def app_store_page(padding: int) -> bytes:
+    inner = json.dumps({"d": [{"attributes": {"platformAttributes": {"ios": {"versionHistory": [{"versionDisplay": "5.0.0"}]}}}}]})
+    script = json.dumps({"apps": inner})
+    return (
+        "<html><head>" + "<meta name=\"x\" content=\"y\">" * padding
+        + f"<script type=\"fake/json-deferred\" id=\"shoebox-media-api-cache-apps\">{script}</script>"
+        + "<div>content</div>" * padding * 2 + "</body></html>"
+    ).encode()
+
+def measure_extract(padding: int, chunk_size: int, runs: int) -> dict:
+    from paypay.version import extract_script, parse_version
+
+    page = app_store_page(padding)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        parse_version(extract_script(page[index:index + chunk_size] for index in range(0, len(page), chunk_size)))
+        samples.append(time.perf_counter() - start)
+
+    return {
+        "page_bytes": len(page),
+        "extract_ms": statistics.median(samples) * 1000
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="import paypay とバージョン取得の起動コストを計測します")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--padding", type=int, default=20000, help="模擬App Storeページの大きさ")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="import時間の上限(超えた場合は終了コード1)")
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    result = dict(measure_startup(args.runs), **measure_extract(args.padding, 16384, args.runs))
+    if args.json:
+        print(json.dumps(result, indent=4))
+    else:
+        print(f"import paypay:      {result['import_ms']:.1f} ms (median of {args.runs})")
+        print(f"PayPay():           {result['create_ms']:.2f} ms")
+        print(f"version extraction: {result['extract_ms']:.2f} ms ({result['page_bytes']} bytes)")
+        print(f"lazy modules loaded at import: {', '.join(result['loaded']) or 'none'}")
+
+    failed = len(result["loaded"]) > 0
+    if args.max_import_ms != None and result["import_ms"] > args.max_import_ms:
+        failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
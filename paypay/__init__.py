@@ -4,4 +4,20 @@ __license__ = "MIT"
 __copyright__ = "Copyright (C) 2024 Yuki"
 __version__ = "1.0.0"
 
-from .paypay import PayPay
\ No newline at end of file
+from .paypay import PayPay, PayPayError
+from .async_paypay import AsyncPayPay
+from .cassette import Cassette, RecordingTransport, AsyncRecordingTransport, ReplayTransport, AsyncReplayTransport
+from .daemon import PayPayDaemon, PayPayClient
+from .decoder import Decoder
+from .journal import RequestJournal
+from .login import BatchLogin
+from .metrics import MetricsCollector, RequestEvent
+from .models import Balance, Profile, HistoryEntry, LinkInfo, P2PCode
+from .policy import Policy, hedged_reads
+from .pool import PayPayPool
+from .scheduler import Scheduler, TokenBucket
+from .store import HistoryStore
+from .transport import Transport, HTTP2Transport, AsyncTransport
+from .version import VersionResolver
+from .writer import LinkWriter
+from .watcher import PaymentWatcher, AsyncPaymentWatcher
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import sys
+import json
+import argparse
+
+from .daemon import PayPayDaemon, PayPayClient
+
+def parse_value(value: str):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+def serve(args) -> None:
+    accounts = dict(token.split("=", 1) for token in args.token)
+    daemon = PayPayDaemon(state_dir=args.state_dir, accounts=accounts, socket_path=args.socket, port=args.port, paypay_version=args.paypay_version, secret_path=args.secret_file)
+    if len(daemon.accounts) == 0:
+        sys.exit("アカウントがありません(--state-dir または --token を指定してください)")
+
+    print(f"serving {len(daemon.accounts)} account(s) on {daemon.socket_path if args.port == None else f'127.0.0.1:{args.port}'}", file=sys.stderr)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+def call(args) -> None:
+    with PayPayClient(socket_path=args.socket, port=args.port, account=args.account, secret_path=args.secret_file) as client:
+        result = client.call(args.method, *[parse_value(value) for value in args.args], **json.loads(args.kwargs))
+    print(json.dumps(result, ensure_ascii=False, indent=4))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m paypay")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="ログイン済みのPayPayを保持するデーモンを起動します")
+    serve_parser.add_argument("--state-dir", default=None, help="save_state/BatchLoginで保存した<name>.jsonのディレクトリ")
+    serve_parser.add_argument("--token", action="append", default=[], help="name=ACCESS_TOKEN")
+    serve_parser.add_argument("--socket", default=None, help="Unixソケットのパス")
+    serve_parser.add_argument("--port", type=int, default=None, help="Unixソケットの代わりに127.0.0.1で待ち受けるポート")
+    serve_parser.add_argument("--paypay-version", default=None)
+    serve_parser.add_argument("--secret-file", default=None, help="認証用シークレットのファイル(権限0600、無ければ作成)。PAYPAY_DAEMON_SECRETが優先されます")
+    serve_parser.set_defaults(func=serve)
+
+    call_parser = commands.add_parser("call", help="デーモン経由でメソッドを呼び出します")
+    call_parser.add_argument("method")
+    call_parser.add_argument("args", nargs="*")
+    call_parser.add_argument("--account", default=None)
+    call_parser.add_argument("--kwargs", default="{}", help="キーワード引数(JSON)")
+    call_parser.add_argument("--socket", default=None)
+    call_parser.add_argument("--port", type=int, default=None)
+    call_parser.add_argument("--secret-file", default=None)
+    call_parser.set_defaults(func=call)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import time
+import asyncio
+import functools
+import itertools
+
+from .paypay import PayPay, PayPayError, Request, LinkBudget, TOKEN_EXPIRED_CODES, history_page, link_calls, link_password
+from .transport import AsyncTransport
+
+class AsyncPayPay(PayPay):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._refresh_lock = None
+        self._refresh_task = None
+
+    def _create_transport(self) -> AsyncTransport:
+        return AsyncTransport(proxy=self.proxy_conf["https"] if self.proxy_conf != None else None, http2=self.http2)
+
+    def __enter__(self):
+        raise TypeError("use async with")
+
+    def __exit__(self, *args) -> None:
+        pass
+
+    async def __aenter__(self) -> "AsyncPayPay":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def prewarm(self, connections: int = 1) -> None:
+        await self.transport.prewarm(self.session, connections=connections)
+
+    async def close(self) -> None:
+        if self._refresh_task != None:
+            self._refresh_task.cancel()
+        if self._owns_transport:
+            await self.transport.aclose()
+
+    async def get_paypay_version(self) -> str:
+        return await asyncio.get_running_loop().run_in_executor(None, self.version_resolver.refresh)
+
+    async def _call(self, func, refresh: bool, args: tuple, kwargs: dict):
+        if not self._can_refresh(refresh):
+            return await self._run(func(self, *args, **kwargs))
+
+        if self._token_expiring():
+            if time.time() >= self.token_expires_at:
+                await self._refresh_tokens(self.access_token)
+            else:
+                self._refresh_tokens_background()
+
+        access_token = self.access_token
+        try:
+            return await self._run(func(self, *args, **kwargs))
+        except PayPayError as error:
+            if not error.args[0] in TOKEN_EXPIRED_CODES:
+                raise
+
+        await self._refresh_tokens(access_token)
+        return await self._run(func(self, *args, **kwargs))
+
+    async def _refresh_tokens(self, access_token: str) -> None:
+        if self._refresh_lock == None:
+            self._refresh_lock = asyncio.Lock()
+
+        async with self._refresh_lock:
+            if self.access_token == access_token:
+                await self.login_refresh()
+
+    def _refresh_tokens_background(self) -> None:
+        if self._refreshing:
+            return
+        self._refreshing = True
+
+        self._refresh_task = asyncio.ensure_future(self._refresh_tokens_worker(self.access_token))
+
+    async def _refresh_tokens_worker(self, access_token: str) -> None:
+        try:
+            await self._refresh_tokens(access_token)
+        except Exception:
+            pass
+        finally:
+            self._refreshing = False
+            self._refresh_task = None
+
+    async def _run(self, generator):
+        if self._paypay_version == None:
+            self._set_paypay_version(await asyncio.get_running_loop().run_in_executor(None, self.version_resolver.get))
+
+        response = None
+        try:
+            while True:
+                request = generator.send(response)
+                response = await self._send(request)
+        except StopIteration as result:
+            return result.value
+
+    async def _send(self, request: Request):
+        return await self.transport.send(getattr(self, request.session), request)
+
+    async def iter_history(self, size: int = 20, cashback: bool = False, since = None):
+        cursor = None
+        while True:
+            items, cursor = history_page(await self.get_history(size, cashback, cursor), since)
+            for item in items:
+                yield item
+            if cursor == None:
+                return
+
+    async def accept_links(self, codes: list, passwords = None, concurrency: int = 8):
+        async for result in self._map_links(self.accept_link, [(code, link_password(passwords, code)) for code in codes], concurrency):
+            yield result
+
+    async def reject_links(self, codes: list, concurrency: int = 8):
+        async for result in self._map_links(self.reject_link, [(code,) for code in codes], concurrency):
+            yield result
+
+    async def create_links(self, amounts: list, password: str = None, concurrency: int = 8, max_total: int = None, keys: list = None):
+        budget = LinkBudget(max_total)
+        async for result in self._map_links(functools.partial(self._create_budgeted_link, budget, password), link_calls(amounts, keys), concurrency):
+            yield result
+
+    async def _create_budgeted_link(self, budget: LinkBudget, password: str, key, amount: int, journal_key: str) -> dict:
+        if not budget.reserve(amount):
+            raise PayPayError(None, "合計金額の上限を超えるため作成しませんでした")
+        try:
+            return await self.create_link(amount, password, key=journal_key)
+        except PayPayError:
+            budget.release(amount)
+            raise
+
+    async def _map_links(self, func, calls: list, concurrency: int):
+        async def call(args: tuple):
+            try:
+                return args[0], await func(*args)
+            except Exception as error:
+                return args[0], error
+
+        calls = iter(calls)
+        tasks = set()
+        try:
+            for args in itertools.islice(calls, concurrency):
+                tasks.add(asyncio.ensure_future(call(args)))
+            while len(tasks) > 0:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    for args in itertools.islice(calls, 1):
+                        tasks.add(asyncio.ensure_future(call(args)))
+                    yield task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
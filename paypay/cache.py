@@ -0,0 +1,72 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import time
+import threading
+
+class TTLCache:
+    def __init__(self, ttl: float = 10, maxsize: int = 1024) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item == None:
+                return None
+            if item[0] < time.monotonic():
+                del self._items[key]
+                return None
+            return item[1]
+
+    def set(self, key, value) -> None:
+        if self.ttl <= 0:
+            return
+
+        with self._lock:
+            self._items.pop(key, None)
+            if len(self._items) >= self.maxsize:
+                now = time.monotonic()
+                for expired in [key for key, item in self._items.items() if item[0] < now]:
+                    del self._items[expired]
+                while len(self._items) >= self.maxsize:
+                    del self._items[next(iter(self._items))]
+            self._items[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key):
+        with self._lock:
+            item = self._items.pop(key, None)
+        if item == None or item[0] < time.monotonic():
+            return None
+        return item[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
@@ -0,0 +1,241 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import re
+import gzip
+import json
+import time
+import hashlib
+import threading
+import requests
+import urllib.parse
+
+from .paypay import PayPayError, cookie_jar
+from .decoder import Decoder, default_decoder
+from .metrics import RequestEvent, emit
+
+MATCH_PARAMS = ("pageSize", "orderTypes", "payPayLang", "client_id")
+KEEP_KEYS = ("resultCode", "resultMessage", "orderStatus", "orderType", "theme", "header")
+SENSITIVE_KEY = re.compile(r"token|password|passcode|phone|mail|name|uuid|url|uri|icon|image|photo|avatar|id$|_id|description|otp|otl|code|key|link")
+
+class Scrubber:
+    def __init__(self, salt: bytes = None) -> None:
+        self.salt = salt if salt != None else os.urandom(16)
+
+    def scrub(self, value, key: str = None):
+        if isinstance(value, dict):
+            return {name: item if name in KEEP_KEYS else self.scrub(item, name) for name, item in value.items()}
+        if isinstance(value, list):
+            return [self.scrub(item, key) for item in value]
+        if isinstance(value, str) and key != None and SENSITIVE_KEY.search(key.lower()):
+            return self.placeholder(value)
+        return value
+
+    def placeholder(self, value: str) -> str:
+        if "://" in value:
+            url = urllib.parse.urlsplit(value)
+            path = "/".join(self.hash(part) if part else part for part in url.path.split("/"))
+            query = urllib.parse.urlencode([(name, self.hash(item)) for name, item in urllib.parse.parse_qsl(url.query)])
+            return urllib.parse.urlunsplit((url.scheme, url.netloc, path, query, ""))
+        return self.hash(value)
+
+    def hash(self, value: str) -> str:
+        return "scrubbed-" + hashlib.sha256(self.salt + value.encode()).hexdigest()[:16]
+
+def match_params(params: dict) -> dict:
+    return {name: str(value) if name in MATCH_PARAMS else "*" for name, value in sorted((params or {}).items())}
+
+def match_key(endpoint: str, method: str, params: dict) -> tuple:
+    return (endpoint, method, tuple(match_params(params).items()))
+
+class Cassette:
+    def __init__(self, interactions: list = None) -> None:
+        self.interactions = []
+        self._index = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        for interaction in interactions or []:
+            self.add(interaction)
+
+    def __len__(self) -> int:
+        return len(self.interactions)
+
+    def add(self, interaction: dict) -> None:
+        with self._lock:
+            self.interactions.append(interaction)
+            key = match_key(interaction["endpoint"], interaction["method"], interaction["params"])
+            self._index.setdefault(key, []).append(interaction)
+
+    def match(self, request, strict: bool = False) -> dict:
+        key = match_key(request.endpoint, request.method, request.params)
+        with self._lock:
+            candidates = self._index.get(key)
+            if candidates == None:
+                raise PayPayError(None, f"カセットに {request.endpoint} ({request.method}) の記録がありません")
+
+            position = self._positions.get(key, 0)
+            if position >= len(candidates):
+                if strict:
+                    raise PayPayError(None, f"カセットの {request.endpoint} の記録を使い切りました")
+                position = 0
+            self._positions[key] = position + 1
+            return candidates[position]
+
+    def rewind(self) -> None:
+        with self._lock:
+            self._positions.clear()
+
+    def save(self, path: str) -> None:
+        content = json.dumps({"version": 1, "interactions": self.interactions}, ensure_ascii=False, separators=(",", ":")).encode()
+        with (gzip.open if path.endswith(".gz") else open)(path, "wb") as file:
+            file.write(content)
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        with (gzip.open if path.endswith(".gz") else open)(path, "rb") as file:
+            return cls(json.loads(file.read())["interactions"])
+
+class RecordingTransport:
+    def __init__(self, transport, path: str = None, scrubber: Scrubber = None) -> None:
+        self.transport = transport
+        self.path = path
+        self.scrubber = scrubber if scrubber != None else Scrubber()
+        self.cassette = Cassette()
+
+    def __getattr__(self, name: str):
+        return getattr(self.transport, name)
+
+    def send(self, session, request, proxies: dict = None):
+        before = self._cookies(session)
+        response = self.transport.send(session, request, proxies=proxies)
+        self._record(session, request, response, before)
+        return response
+
+    def save(self, path: str = None) -> None:
+        self.cassette.save(path if path != None else self.path)
+
+    def close(self) -> None:
+        if self.path != None:
+            self.save()
+        self.transport.close()
+
+    def _cookies(self, session) -> set:
+        return set(cookie.name for cookie in cookie_jar(session))
+
+    def _record(self, session, request, response, before: set) -> None:
+        interaction = {
+            "endpoint": request.endpoint,
+            "method": request.method,
+            "params": match_params(request.params),
+            "cookies": sorted(self._cookies(session) - before)
+        }
+        if request.decode:
+            interaction["response"] = self.scrubber.scrub(response)
+        else:
+            interaction["status"] = response.status_code
+        self.cassette.add(interaction)
+
+class AsyncRecordingTransport(RecordingTransport):
+    async def send(self, session, request):
+        before = self._cookies(session)
+        response = await self.transport.send(session, request)
+        self._record(session, request, response, before)
+        return response
+
+    async def aclose(self) -> None:
+        if self.path != None:
+            self.save()
+        await self.transport.aclose()
+
+class ReplayTransport:
+    def __init__(self, cassette, decoder: Decoder = None, strict: bool = False, hooks: list = None) -> None:
+        self.cassette = cassette if isinstance(cassette, Cassette) else Cassette.load(cassette)
+        self.decoder = decoder if decoder != None else default_decoder
+        self.strict = strict
+        self.hooks = list(hooks or [])
+        self.pool_maxsize = 1
+        self.http2 = False
+        self._bodies = {}
+
+    def create_session(self) -> requests.Session:
+        return requests.Session()
+
+    def add_hook(self, hook) -> None:
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook) -> None:
+        self.hooks.remove(hook)
+
+    def send(self, session, request, proxies: dict = None):
+        if self.hooks:
+            return self._send_instrumented(session, request)
+        return self._replay(session, request)
+
+    def _replay(self, session, request):
+        interaction = self.cassette.match(request, self.strict)
+        for name in interaction["cookies"]:
+            session.cookies.set(name, "scrubbed")
+
+        if not "response" in interaction:
+            response = requests.Response()
+            response.status_code = interaction["status"]
+            response._content = b""
+            return response
+
+        body = self._bodies.get(id(interaction))
+        if body == None:
+            body = self._bodies[id(interaction)] = json.dumps(interaction["response"]).encode()
+        return self.decoder.decode(body, request.schema)
+
+    def _send_instrumented(self, session, request):
+        event = RequestEvent(request)
+        try:
+            start = time.perf_counter()
+            response = self._replay(session, request)
+            event.add("decode", time.perf_counter() - start)
+            event.status = getattr(response, "status_code", 200)
+            event.set_result(response)
+        except Exception as exception:
+            emit(self.hooks, event.finish(exception))
+            raise
+
+        emit(self.hooks, event.finish())
+        return response
+
+    def prewarm(self, session, hosts: tuple = None, connections: int = 1, proxies: dict = None) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+class AsyncReplayTransport(ReplayTransport):
+    async def send(self, session, request):
+        return ReplayTransport.send(self, session, request)
+
+    async def prewarm(self, session, hosts: tuple = None, connections: int = 1) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        pass
@@ -0,0 +1,309 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import hmac
+import json
+import socket
+import secrets
+import threading
+import socketserver
+
+from .paypay import PayPay, PayPayError
+from .transport import Transport
+from .models import Model
+
+METHODS = (
+    "get_balance", "get_history", "get_profile", "get_p2p_code", "get_link",
+    "create_link", "accept_link", "reject_link", "create_links", "accept_links", "reject_links",
+    "login_refresh", "reconcile"
+)
+READ_METHODS = ("accounts", "get_balance", "get_history", "get_profile", "get_p2p_code", "get_link")
+
+def default_socket_path() -> str:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "paypay.sock")
+    return os.path.join("/tmp", f"paypay-{os.getuid()}.sock")
+
+def default_secret_path() -> str:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "paypay.secret")
+    return os.path.join(os.path.expanduser("~"), ".paypay.secret")
+
+def load_secret(path: str = None, create: bool = False) -> str:
+    if os.environ.get("PAYPAY_DAEMON_SECRET"):
+        return os.environ["PAYPAY_DAEMON_SECRET"]
+    path = path if path != None else default_secret_path()
+
+    if create and not os.path.exists(path):
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_urlsafe(32))
+
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+    except OSError as error:
+        raise PayPayError(None, f"シークレットファイル {path} を開けません: {error}")
+    with os.fdopen(fd, "r") as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+            raise PayPayError(None, f"シークレットファイル {path} の権限は0600にしてください")
+        secret = f.read().strip()
+    if not secret:
+        raise PayPayError(None, f"シークレットファイル {path} が空です")
+    return secret
+
+def encode_error(error: Exception) -> dict:
+    if isinstance(error, PayPayError):
+        return {"type": "PayPayError", "code": error.args[0] if len(error.args) > 0 else None, "message": error.args[1] if len(error.args) > 1 else str(error)}
+    return {"type": type(error).__name__, "code": None, "message": str(error)}
+
+def decode_error(error: dict) -> Exception:
+    if error["type"] == "PayPayError":
+        return PayPayError(error["code"], error["message"])
+    return PayPayError(None, f"{error['type']}: {error['message']}")
+
+def encode_result(result):
+    if isinstance(result, Model):
+        return result.to_dict()
+    if hasattr(result, "__next__"):
+        return [[key, {"error": encode_error(value)} if isinstance(value, Exception) else {"result": encode_result(value)}] for key, value in result]
+    return result
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        daemon = self.server.paypay_daemon
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+                if not isinstance(message, dict):
+                    raise ValueError("message must be a JSON object")
+            except ValueError as error:
+                self.respond({"id": None, "error": encode_error(error)})
+                return
+            if not daemon.authenticate(message):
+                self.respond({"id": message.get("id"), "error": encode_error(PayPayError(None, "認証に失敗しました"))})
+                return
+            self.respond(daemon.dispatch(message))
+
+    def respond(self, response: dict) -> None:
+        self.wfile.write(json.dumps(response, ensure_ascii=False, default=str).encode() + b"\n")
+        self.wfile.flush()
+
+class TCPHandler(Handler):
+    disable_nagle_algorithm = True
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class PayPayDaemon:
+    def __init__(self, state_dir: str = None, accounts: dict = None, socket_path: str = None, port: int = None, transport: Transport = None, paypay_version: str = None, secret: str = None, secret_path: str = None) -> None:
+        self.state_dir = state_dir
+        self.secret = secret if secret != None else load_secret(secret_path, create=True)
+        self.socket_path = socket_path if socket_path != None or port != None else default_socket_path()
+        self.port = port
+        self.transport = transport if transport != None else Transport(pool_maxsize=32)
+        self.paypay_version = paypay_version
+        self.accounts = {}
+        self.server = None
+        self._tokens = {}
+
+        if state_dir != None and os.path.isdir(state_dir):
+            for name in sorted(os.listdir(state_dir)):
+                if name.endswith(".json"):
+                    self.add(name[:-5], PayPay.load_state(os.path.join(state_dir, name), transport=self.transport))
+        for name, access_token in (accounts or {}).items():
+            self.add(name, PayPay(access_token=access_token, transport=self.transport, paypay_version=paypay_version))
+
+    def add(self, name: str, paypay: PayPay) -> None:
+        self.accounts[name] = paypay
+        self._tokens[name] = paypay.access_token
+
+    def account(self, name: str) -> PayPay:
+        if name == None:
+            if len(self.accounts) != 1:
+                raise PayPayError(None, "アカウントを指定してください")
+            return next(iter(self.accounts.values()))
+        if not name in self.accounts:
+            raise PayPayError(None, f"アカウント {name} は登録されていません")
+        return self.accounts[name]
+
+    def authenticate(self, message: dict) -> bool:
+        secret = message.get("secret")
+        return isinstance(secret, str) and hmac.compare_digest(secret.encode(), self.secret.encode())
+
+    def dispatch(self, message: dict) -> dict:
+        try:
+            if not self.authenticate(message):
+                raise PayPayError(None, "認証に失敗しました")
+            method = message.get("method")
+            if method == "accounts":
+                return {"id": message.get("id"), "result": sorted(self.accounts)}
+            if not method in METHODS:
+                raise PayPayError(None, f"メソッド {method} は利用できません")
+
+            name = message.get("account")
+            paypay = self.account(name)
+            result = encode_result(getattr(paypay, method)(*message.get("args", []), **message.get("kwargs", {})))
+            self._persist(name, paypay)
+            return {"id": message.get("id"), "result": result}
+        except Exception as error:
+            return {"id": message.get("id"), "error": encode_error(error)}
+
+    def warm(self) -> None:
+        for paypay in self.accounts.values():
+            paypay.paypay_version
+        if len(self.accounts) > 0:
+            next(iter(self.accounts.values())).prewarm(connections=min(len(self.accounts), self.transport.pool_maxsize))
+
+    def serve_forever(self) -> None:
+        self.warm()
+        if self.port != None:
+            self.server = TCPServer(("127.0.0.1", self.port), TCPHandler)
+        else:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            umask = os.umask(0o177)
+            try:
+                self.server = UnixServer(self.socket_path, Handler)
+            finally:
+                os.umask(umask)
+        self.server.paypay_daemon = self
+
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if self.port == None and os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self) -> None:
+        if self.server != None:
+            self.server.shutdown()
+        self.transport.close()
+
+    def _persist(self, name: str, paypay: PayPay) -> None:
+        if name == None:
+            name = next(iter(self.accounts))
+        if self._tokens.get(name) == paypay.access_token:
+            return
+        self._tokens[name] = paypay.access_token
+        if self.state_dir != None:
+            paypay.save_state(os.path.join(self.state_dir, f"{name}.json"))
+
+class PayPayClient:
+    def __init__(self, socket_path: str = None, port: int = None, account: str = None, timeout: float = 60, secret: str = None, secret_path: str = None) -> None:
+        self.secret = secret if secret != None else load_secret(secret_path)
+        self.socket_path = socket_path if socket_path != None or port != None else default_socket_path()
+        self.port = port
+        self.account = account
+        self.timeout = timeout
+        self._socket = None
+        self._file = None
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "PayPayClient":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or not name in METHODS:
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+
+        return call
+
+    def accounts(self) -> list:
+        return self.call("accounts")
+
+    def call(self, method: str, *args, account: str = None, **kwargs):
+        with self._lock:
+            self._sequence += 1
+            message = {
+                "id": self._sequence,
+                "secret": self.secret,
+                "account": account if account != None else self.account,
+                "method": method,
+                "args": list(args),
+                "kwargs": kwargs
+            }
+            try:
+                response = self._exchange(message)
+            except OSError:
+                self.close()
+                if not method in READ_METHODS:
+                    raise
+                response = self._exchange(message)
+
+        if "error" in response:
+            raise decode_error(response["error"])
+        return response["result"]
+
+    def close(self) -> None:
+        if self._socket != None:
+            self._file.close()
+            self._socket.close()
+            self._socket = None
+            self._file = None
+
+    def _exchange(self, message: dict) -> dict:
+        if self._socket == None:
+            self._connect()
+        self._socket.sendall(json.dumps(message, ensure_ascii=False).encode() + b"\n")
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("daemon closed the connection")
+        return json.loads(line)
+
+    def _connect(self) -> None:
+        if self.port != None:
+            self._socket = socket.create_connection(("127.0.0.1", self.port), timeout=self.timeout)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(self.timeout)
+            self._socket.connect(self.socket_path)
+        self._file = self._socket.makefile("rb")
@@ -0,0 +1,100 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import typing
+
+BACKENDS = ("orjson", "msgspec", "json")
+
+def load_backend(name: str):
+    if name == "orjson":
+        import orjson
+        return orjson.loads
+    if name == "msgspec":
+        import msgspec
+        return msgspec.json.decode
+    if name == "json":
+        return json.loads
+    raise ValueError(f"backend must be one of {BACKENDS}")
+
+def find_backend() -> str:
+    for name in BACKENDS:
+        try:
+            load_backend(name)
+        except ImportError:
+            continue
+        return name
+
+def schema(paths) -> dict:
+    spec = {}
+    for path in paths:
+        node = spec
+        for key in path[:-1]:
+            if not isinstance(node.get(key), dict):
+                node[key] = {}
+            node = node[key]
+        node.setdefault(path[-1], None)
+    return spec
+
+class Decoder:
+    def __init__(self, backend: str = None, selective: bool = False) -> None:
+        self.backend = backend if backend != None else find_backend()
+        self.loads = load_backend(self.backend)
+        self.selective = False
+        self._decoders = {}
+
+        if selective:
+            try:
+                import msgspec
+            except ImportError:
+                pass
+            else:
+                self.selective = True
+
+    def decode(self, content: bytes, spec: dict = None):
+        if spec == None or not self.selective:
+            return self.loads(content)
+
+        import msgspec
+
+        decoder = self._decoders.get(id(spec))
+        if decoder == None:
+            decoder = self._decoders[id(spec)] = msgspec.json.Decoder(self._struct(spec))
+        return msgspec.to_builtins(decoder.decode(content))
+
+    def _struct(self, spec, name: str = "Schema"):
+        import msgspec
+
+        if spec == None:
+            return typing.Any
+        if isinstance(spec, list):
+            return typing.Optional[typing.List[self._struct(spec[0], name)]]
+
+        fields = [
+            (key, typing.Union[self._struct(value, key), msgspec.UnsetType], msgspec.UNSET)
+            for key, value in spec.items()
+        ]
+        return typing.Optional[msgspec.defstruct(name, fields)]
+
+default_decoder = Decoder()
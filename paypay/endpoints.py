@@ -0,0 +1,279 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from types import MappingProxyType
+
+from .models import Balance, HistoryEntry, LinkInfo
+from .decoder import schema
+
+APP_URL = "https://app4.paypay.ne.jp"
+WEB_URL = "https://www.paypay.ne.jp"
+
+WEBVIEW_USER_AGENT = "Mozilla/5.0 (Linux; Android 9; SM-G955N Build/NRD90M.G955NKSU1AQDC; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/92.0.4515.131 Mobile Safari/537.36 jp.pay2.app.android/{version}"
+SIGN_IN_REFERER = "https://www.paypay.ne.jp/portal/oauth2/sign-in?client_id=pay2-mobile-app-client&mode=landing"
+
+HISTORY_CURSOR = "lastEvaluatedKey"
+
+RESULT_PATHS = [("header", "resultCode"), ("header", "resultMessage")]
+BALANCE_SCHEMA = schema(RESULT_PATHS + list(Balance.fields.values()))
+LINK_INFO_SCHEMA = schema(RESULT_PATHS + list(LinkInfo.fields.values()))
+HISTORY_SCHEMA = schema(RESULT_PATHS + [("payload", HISTORY_CURSOR)])
+HISTORY_SCHEMA["payload"]["paymentInfoList"] = [schema(HistoryEntry.fields.values())]
+
+PAYPAY_LANG = MappingProxyType({"payPayLang": "ja"})
+
+class Endpoint:
+    def __init__(self, name: str, method: str, url: str, headers: dict = None, params: dict = None, session: str = "session", decode: bool = True, schema: dict = None) -> None:
+        self.name = name
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.params = MappingProxyType(params) if params != None else None
+        self.session = session
+        self.decode = decode
+        self.schema = schema
+
+        self._compiled = {}
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.name!r}, {self.method!r}, {self.url!r})"
+
+    def compile(self, version: str) -> MappingProxyType:
+        headers = self._compiled.get(version)
+        if headers == None:
+            headers = self._compiled[version] = MappingProxyType({
+                key: value.replace("{version}", version) if isinstance(value, str) else value
+                for key, value in self.headers.items()
+            })
+        return headers
+
+PAR = Endpoint("par", "POST", f"{APP_URL}/bff/v2/oauth2/par", params=PAYPAY_LANG)
+AUTHORIZE = Endpoint(
+    "authorize",
+    "GET",
+    f"{WEB_URL}/portal/api/v2/oauth2/authorize",
+    headers={
+        "Host": "www.paypay.ne.jp",
+        "Pragma": "no-cache",
+        "Cache-Control": "no-cache",
+        "Upgrade-Insecure-Requests": "1",
+        "User-Agent": WEBVIEW_USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
+        "X-Requested-With": "jp.ne.paypay.android.app",
+        "Sec-Fetch-Site": "none",
+        "Sec-Fetch-Mode": "navigate",
+        "Sec-Fetch-User": "?1",
+        "Sec-Fetch-Dest": "document",
+        "Accept-Encoding": "gzip, deflate",
+        "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7",
+        "Connection": "keep-alive"
+    },
+    decode=False
+)
+PAR_CHECK = Endpoint(
+    "par_check",
+    "GET",
+    f"{WEB_URL}/portal/api/v2/oauth2/par/check",
+    headers={
+        "Host": "www.paypay.ne.jp",
+        "Pragma": "no-cache",
+        "Cache-Control": "no-cache",
+        "User-Agent": WEBVIEW_USER_AGENT,
+        "Accept": "application/json, text/plain, */*",
+        "Client-Os-Version": "28.0.0",
+        "Client-Version": "{version}",
+        "Client-Type": "PAYPAYAPP",
+        "Client-App-Load-Start": None,
+        "Client-Id": "pay2-mobile-app-client",
+        "Sentry-Trace": "NULL",
+        "Baggage": "NULL",
+        "X-Requested-With": "jp.ne.paypay.android.app",
+        "Sec-Fetch-Site": "same-origin",
+        "Sec-Fetch-Mode": "cors",
+        "Sec-Fetch-User": "empty",
+        "Referer": SIGN_IN_REFERER,
+        "Accept-Encoding": "gzip, deflate",
+        "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7"
+    }
+)
+SIGN_IN_PASSWORD = Endpoint(
+    "sign_in_password",
+    "POST",
+    f"{WEB_URL}/portal/api/v2/oauth2/sign-in/password",
+    headers={
+        "Host": "www.paypay.ne.jp",
+        "Pragma": "no-cache",
+        "Cache-Control": "no-cache",
+        "Client-Os-Version": "28.0.0",
+        "Client-Version": "{version}",
+        "User-Agent": WEBVIEW_USER_AGENT,
+        "Content-Type": "application/json",
+        "Accept": "application/json, text/plain, */*",
+        "Client-App-Load-Start": None,
+        "Client-Type": "PAYPAYAPP",
+        "Sentry-Trace": "NULL",
+        "Baggage": "NULL",
+        "Origin": "https://www.paypay.ne.jp",
+        "X-Requested-With": "jp.ne.paypay.android.app",
+        "Sec-Fetch-Site": "same-origin",
+        "Sec-Fetch-Mode": "cors",
+        "Sec-Fetch-Dest": "empty",
+        "Referer": SIGN_IN_REFERER,
+        "Accept-Encoding": "gzip, deflate",
+        "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7"
+    }
+)
+CODE_GRANT_SELECT = Endpoint(
+    "code_grant_select",
+    "POST",
+    f"{WEB_URL}/portal/api/v2/oauth2/extension/code-grant/update",
+    headers={
+        "Host": "www.paypay.ne.jp",
+        "Pragma": "no-cache",
+        "Cache-Control": "no-cache",
+        "Client-Os-Version": "28.0.0",
+        "Client-Version": "{version}",
+        "User-Agent": WEBVIEW_USER_AGENT,
+        "Content-Type": "application/json",
+        "Accept": "application/json, text/plain, */*",
+        "Client-Type": "PAYPAYAPP",
+        "Client-App-Load-Start": None,
+        "Sentry-Trace": "NULL",
+        "Baggage": "NULL",
+        "Origin": "https://www.paypay.ne.jp",
+        "X-Requested-With": "jp.ne.paypay.android.app",
+        "Sec-Fetch-Site": "same-origin",
+        "Sec-Fetch-Mode": "cors",
+        "Sec-Fetch-Dest": "empty",
+        "Referer": SIGN_IN_REFERER,
+        "Accept-Encoding": "gzip, deflate, br",
+        "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7"
+    }
+)
+OTL_VERIFY = Endpoint(
+    "otl_verify",
+    "POST",
+    f"{WEB_URL}/portal/api/v2/oauth2/extension/sign-in/2fa/otl/verify",
+    headers={
+        "Host": "www.paypay.ne.jp",
+        "Pragma": "no-cache",
+        "Cache-Control": "no-cache",
+        "Client-Os-Version": "28.0.0",
+        "User-Agent": WEBVIEW_USER_AGENT,
+        "Content-Type": "application/json",
+        "Accept": "application/json, text/plain, */*",
+        "Client-Type": "PAYPAYWEB",
+        "Sentry-Trace": "NULL",
+        "Baggage": "NULL",
+        "Origin": "https://www.paypay.ne.jp",
+        "Sec-Fetch-Site": "same-origin",
+        "Sec-Fetch-Mode": "cors",
+        "Sec-Fetch-Dest": "empty",
+        "Referer": None,
+        "Accept-Encoding": "gzip, deflate, br, zstd",
+        "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7"
+    },
+    session="_session"
+)
+SELECT_OTP = Endpoint(
+    "select_otp",
+    "GET",
+    f"{WEB_URL}/portal/oauth2/extension-select-otp",
+    headers={
+        "Host": "www.paypay.ne.jp",
+        "Pragma": "no-cache",
+        "Cache-Control": "no-cache",
+        "Upgrade-Insecure-Requests": "1",
+        "User-Agent": WEBVIEW_USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
+        "X-Requested-With": "jp.ne.paypay.android.app",
+        "Sec-Fetch-Site": "none",
+        "Sec-Fetch-Mode": "navigate",
+        "Sec-Fetch-User": "?1",
+        "Sec-Fetch-Dest": "document",
+        "Accept-Encoding": "gzip, deflate, br",
+        "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7"
+    },
+    decode=False
+)
+CODE_GRANT_OTP = Endpoint(
+    "code_grant_otp",
+    "POST",
+    f"{WEB_URL}/portal/api/v2/oauth2/extension/code-grant/update",
+    headers={
+        "Host": "www.paypay.ne.jp",
+        "Pragma": "no-cache",
+        "Cache-Control": "no-cache",
+        "User-Agent": WEBVIEW_USER_AGENT,
+        "Content-Type": "application/json",
+        "Accept": "application/json, text/plain, */*",
+        "Client-Os-Version": "28.0.0",
+        "Client-Version": "{version}",
+        "Client-Type": "PAYPAYAPP",
+        "Client-App-Load-Start": None,
+        "Sentry-Trace": "NULL",
+        "Baggage": "NULL",
+        "X-Requested-With": "jp.ne.paypay.android.app",
+        "Sec-Fetch-Site": "same-origin",
+        "Sec-Fetch-Mode": "cors",
+        "Sec-Fetch-User": "empty",
+        "Referer": SIGN_IN_REFERER,
+        "Accept-Encoding": "gzip, deflate",
+        "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7"
+    }
+)
+TOKEN = Endpoint("token", "POST", f"{APP_URL}/bff/v2/oauth2/token", params=PAYPAY_LANG)
+REFRESH = Endpoint("refresh", "POST", f"{APP_URL}/bff/v2/oauth2/refresh")
+SIGN_OUT = Endpoint("sign_out", "POST", f"{APP_URL}/bff/v1/signOut", params=PAYPAY_LANG)
+BALANCE = Endpoint(
+    "balance",
+    "GET",
+    f"{APP_URL}/bff/v1/getBalanceInfo",
+    params={
+        "includePendingBonusLite": "false",
+        "includePending": "true",
+        "includePreAuth": "true",
+        "noCache": "true",
+        "includeKycInfo": "true",
+        "payPayLang": "ja"
+    },
+    schema=BALANCE_SCHEMA
+)
+HISTORY = Endpoint("history", "GET", f"{APP_URL}/bff/v3/getPaymentHistory", schema=HISTORY_SCHEMA)
+PROFILE = Endpoint(
+    "profile",
+    "GET",
+    f"{APP_URL}/bff/v2/getProfileDisplayInfo",
+    params={
+        "includeExternalProfileSync": "true",
+        "payPayLang": "ja"
+    }
+)
+P2P_CODE = Endpoint("p2p_code", "POST", f"{APP_URL}/bff/v1/createP2PCode", params=PAYPAY_LANG)
+LINK_INFO = Endpoint("link_info", "GET", f"{APP_URL}/bff/v2/getP2PLinkInfo", schema=LINK_INFO_SCHEMA)
+CREATE_LINK = Endpoint("create_link", "POST", f"{APP_URL}/bff/v2/executeP2PSendMoneyLink", params=PAYPAY_LANG)
+ACCEPT_LINK = Endpoint("accept_link", "POST", f"{APP_URL}/bff/v2/acceptP2PSendMoneyLink", params=PAYPAY_LANG)
+REJECT_LINK = Endpoint("reject_link", "POST", f"{APP_URL}/bff/v2/rejectP2PSendMoneyLink", params=PAYPAY_LANG)
+
+ENDPOINTS = {endpoint.name: endpoint for endpoint in (PAR, AUTHORIZE, PAR_CHECK, SIGN_IN_PASSWORD, CODE_GRANT_SELECT, OTL_VERIFY, SELECT_OTP, CODE_GRANT_OTP, TOKEN, REFRESH, SIGN_OUT, BALANCE, HISTORY, PROFILE, P2P_CODE, LINK_INFO, CREATE_LINK, ACCEPT_LINK, REJECT_LINK)}
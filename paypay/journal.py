@@ -0,0 +1,141 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+class RequestJournal:
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock, self.connection:
+            self.connection.executescript("""
+                PRAGMA journal_mode = WAL;
+                PRAGMA synchronous = FULL;
+                CREATE TABLE IF NOT EXISTS journal (
+                    request_id TEXT PRIMARY KEY,
+                    operation TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    UNIQUE (operation, key)
+                );
+                CREATE INDEX IF NOT EXISTS journal_status ON journal (status, created_at);
+            """)
+
+    def __enter__(self) -> "RequestJournal":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+
+    def begin(self, operation: str, key: str, payload: dict) -> dict:
+        now = time.time()
+        with self._lock, self.connection:
+            row = self.connection.execute("SELECT * FROM journal WHERE operation = ? AND key = ?", (operation, key)).fetchone()
+            if row != None and row["status"] != FAILED:
+                return self._entry(row)
+
+            request_id = payload.get("requestId") or str(uuid.uuid4())
+            payload = dict(payload, requestId=request_id)
+            if row != None:
+                self.connection.execute("DELETE FROM journal WHERE request_id = ?", (row["request_id"],))
+            self.connection.execute(
+                "INSERT INTO journal VALUES (?, ?, ?, ?, ?, NULL, NULL, ?, ?)",
+                (request_id, operation, key, PENDING, json.dumps(payload, ensure_ascii=False), now, now)
+            )
+
+        return {
+            "request_id": request_id,
+            "operation": operation,
+            "key": key,
+            "status": PENDING,
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+
+    def complete(self, request_id: str, result: dict) -> None:
+        self._update(request_id, DONE, result=json.dumps(result, ensure_ascii=False))
+
+    def fail(self, request_id: str, error: str) -> None:
+        self._update(request_id, FAILED, error=error)
+
+    def get(self, operation: str, key: str) -> dict:
+        with self._lock:
+            row = self.connection.execute("SELECT * FROM journal WHERE operation = ? AND key = ?", (operation, key)).fetchone()
+        return self._entry(row) if row != None else None
+
+    def find(self, request_id: str) -> dict:
+        with self._lock:
+            row = self.connection.execute("SELECT * FROM journal WHERE request_id = ?", (request_id,)).fetchone()
+        return self._entry(row) if row != None else None
+
+    def pending(self, operation: str = None) -> list:
+        query = "SELECT * FROM journal WHERE status = ?"
+        params = [PENDING]
+        if operation != None:
+            query += " AND operation = ?"
+            params.append(operation)
+
+        with self._lock:
+            rows = self.connection.execute(query + " ORDER BY created_at", params).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self.connection.close()
+
+    def _update(self, request_id: str, status: str, result: str = None, error: str = None) -> None:
+        with self._lock, self.connection:
+            self.connection.execute(
+                "UPDATE journal SET status = ?, result = COALESCE(?, result), error = ?, updated_at = ? WHERE request_id = ?",
+                (status, result, error, time.time(), request_id)
+            )
+
+    def _entry(self, row: sqlite3.Row) -> dict:
+        entry = dict(row)
+        entry["payload"] = json.loads(entry["payload"])
+        entry["result"] = json.loads(entry["result"]) if entry["result"] != None else None
+        return entry
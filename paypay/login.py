@@ -0,0 +1,171 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import json
+import time
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .paypay import PayPay
+from .transport import Transport
+from .version import VersionResolver, default_resolver
+
+class BatchLogin:
+    def __init__(self, state_dir: str = None, concurrency: int = 16, transport: Transport = None, paypay_version: str = None, version_resolver: VersionResolver = None, proxy_conf: str = None) -> None:
+        self.state_dir = state_dir
+        self.concurrency = concurrency
+        self.paypay_version = paypay_version
+        self.version_resolver = version_resolver if version_resolver != None else default_resolver
+        self.proxy_conf = proxy_conf
+
+        self.transport = transport if transport != None else Transport(pool_connections=2, pool_maxsize=concurrency)
+        self._owns_transport = transport == None
+        self.transport.add_hook(self._record)
+
+        self.accounts = {}
+        self.timings = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        if state_dir != None:
+            os.makedirs(state_dir, exist_ok=True)
+
+    def __enter__(self) -> "BatchLogin":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.transport.remove_hook(self._record)
+        if self._owns_transport:
+            self.transport.close()
+
+    def prewarm(self) -> float:
+        start = time.perf_counter()
+        proxies = {"http": self.proxy_conf, "https": self.proxy_conf} if self.proxy_conf != None else None
+        self.transport.prewarm(self.transport.create_session(), connections=self.concurrency, proxies=proxies)
+        return time.perf_counter() - start
+
+    def start(self, credentials: dict):
+        prewarm = self.prewarm()
+        for key, result in self._map(self._start, list(credentials.items())):
+            if not isinstance(result, Exception):
+                self._timing(key)["prewarm"] = prewarm
+            yield key, result
+
+    def confirm(self, urls: dict):
+        prewarm = self.prewarm()
+        for key, result in self._map(self._confirm, list(urls.items())):
+            if not isinstance(result, Exception):
+                self._timing(key)["confirm_prewarm"] = prewarm
+            yield key, result
+
+    def pending(self) -> list:
+        keys = set(key for key, paypay in self.accounts.items() if paypay.access_token == None)
+        if self.state_dir != None:
+            for name in os.listdir(self.state_dir):
+                if name.endswith(".json") and not name[:-5] in self.accounts and self._saved_pending(name[:-5]):
+                    keys.add(name[:-5])
+        return sorted(keys)
+
+    def account(self, key: str) -> PayPay:
+        paypay = self.accounts.get(key)
+        if paypay == None and self.state_dir != None and os.path.exists(self._path(key)):
+            paypay = PayPay.load_state(self._path(key), **self._options())
+            with self._lock:
+                self.accounts[key] = paypay
+        return paypay
+
+    def _start(self, key: str, credentials: tuple) -> PayPay:
+        paypay = PayPay(**self._options(), paypay_version=self.paypay_version)
+        with self._lock:
+            self.accounts[key] = paypay
+
+        self._timed(key, "login_start", paypay.login_start, *credentials)
+        self._save(key, paypay)
+        return paypay
+
+    def _confirm(self, key: str, url: str) -> PayPay:
+        paypay = self.account(key)
+        if paypay == None:
+            raise KeyError(key)
+
+        self._timed(key, "login_confirm", paypay.login_confirm, url)
+        self._save(key, paypay)
+        return paypay
+
+    def _timed(self, key: str, step: str, func, *args):
+        self._local.key = key
+        self._local.step = step
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self._timing(key)[step] = time.perf_counter() - start
+            self._local.key = None
+
+    def _record(self, event) -> None:
+        key = getattr(self._local, "key", None)
+        if key != None:
+            self._timing(key).setdefault("requests", []).append((self._local.step, event.endpoint, event.timings.get("total")))
+
+    def _timing(self, key: str) -> dict:
+        with self._lock:
+            timing = self.timings.get(key)
+            if timing == None:
+                timing = self.timings[key] = {}
+            return timing
+
+    def _options(self) -> dict:
+        return {
+            "transport": self.transport,
+            "version_resolver": self.version_resolver,
+            "proxy_conf": self.proxy_conf
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.state_dir, f"{key}.json")
+
+    def _saved_pending(self, key: str) -> bool:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f).get("accessToken") == None
+        except (OSError, ValueError):
+            return False
+
+    def _save(self, key: str, paypay: PayPay) -> None:
+        if self.state_dir != None:
+            paypay.save_state(self._path(key))
+
+    def _map(self, func, calls: list):
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {executor.submit(func, *args): args[0] for args in calls}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as error:
+                    yield futures[future], error
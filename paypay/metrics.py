@@ -0,0 +1,185 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import time
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+TRACE_PHASES = {
+    "connect_tcp": "connect",
+    "start_tls": "tls",
+    "send_request_headers": "send",
+    "send_request_body": "send",
+    "receive_response_headers": "wait",
+    "receive_response_body": "read"
+}
+
+class RequestEvent:
+    __slots__ = ("endpoint", "method", "url", "status", "result_code", "http_version", "bytes_out", "bytes_in", "timings", "error", "_start", "_trace")
+
+    def __init__(self, request) -> None:
+        self.endpoint = request.endpoint
+        self.method = request.method
+        self.url = request.url
+        self.status = None
+        self.result_code = None
+        self.http_version = None
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.timings = {}
+        self.error = None
+        self._start = time.perf_counter()
+        self._trace = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.timings[phase] = self.timings.get(phase, 0) + seconds
+
+    async def trace(self, name: str, info: dict) -> None:
+        self.record(name, info)
+
+    def record(self, name: str, info: dict) -> None:
+        _, step, state = name.rsplit(".", 2) if name.count(".") >= 2 else (None, None, None)
+        phase = TRACE_PHASES.get(step)
+        if phase == None:
+            return
+
+        if state == "started":
+            self._trace[step] = time.perf_counter()
+        elif state in ("complete", "failed") and step in self._trace:
+            self.add(phase, time.perf_counter() - self._trace.pop(step))
+
+    def set_result(self, result) -> None:
+        if isinstance(result, dict):
+            header = result.get("header")
+            if isinstance(header, dict):
+                self.result_code = header.get("resultCode")
+
+    def finish(self, error: Exception = None) -> "RequestEvent":
+        if error != None:
+            self.error = type(error).__name__
+        self.timings["total"] = time.perf_counter() - self._start
+        return self
+
+    def __repr__(self) -> str:
+        return f"RequestEvent({self.endpoint!r}, {self.method!r}, status={self.status!r}, result_code={self.result_code!r}, total={self.timings.get('total')!r})"
+
+def emit(hooks: list, event: RequestEvent) -> None:
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception:
+            pass
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def format_labels(labels: tuple) -> str:
+    return ",".join(f"{name}=\"{escape(value)}\"" for name, value in labels)
+
+def format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list:
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        result.append((float("inf"), self.count))
+        return result
+
+class MetricsCollector:
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS, namespace: str = "paypay") -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.namespace = namespace
+        self.durations = {}
+        self.requests = {}
+        self.bytes = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: RequestEvent) -> None:
+        status = str(event.status) if event.status != None else "error"
+        with self._lock:
+            for phase, seconds in event.timings.items():
+                key = (("endpoint", event.endpoint), ("phase", phase))
+                histogram = self.durations.get(key)
+                if histogram == None:
+                    histogram = self.durations[key] = Histogram(self.buckets)
+                histogram.observe(seconds)
+
+            key = (("endpoint", event.endpoint), ("method", event.method), ("status", status), ("result_code", event.result_code or ""), ("error", event.error or ""), ("http_version", event.http_version or ""))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            for direction, size in (("out", event.bytes_out), ("in", event.bytes_in)):
+                key = (("endpoint", event.endpoint), ("direction", direction))
+                self.bytes[key] = self.bytes.get(key, 0) + size
+
+    def reset(self) -> None:
+        with self._lock:
+            self.durations.clear()
+            self.requests.clear()
+            self.bytes.clear()
+
+    def export(self) -> str:
+        name = f"{self.namespace}_request_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each phase of a PayPay request.",
+            f"# TYPE {name} histogram"
+        ]
+        with self._lock:
+            for labels, histogram in sorted(self.durations.items()):
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{name}_bucket{{{format_labels(labels + (('le', format_number(bound)),))}}} {count}")
+                lines.append(f"{name}_sum{{{format_labels(labels)}}} {format_number(histogram.sum)}")
+                lines.append(f"{name}_count{{{format_labels(labels)}}} {histogram.count}")
+
+            for metric, description, values in (
+                ("requests_total", "PayPay requests by endpoint, status and result code.", self.requests),
+                ("request_bytes_total", "Bytes sent and received per endpoint.", self.bytes)
+            ):
+                lines.append(f"# HELP {self.namespace}_{metric} {description}")
+                lines.append(f"# TYPE {self.namespace}_{metric} counter")
+                for labels, value in sorted(values.items()):
+                    lines.append(f"{self.namespace}_{metric}{{{format_labels(labels)}}} {value}")
+
+        return "\n".join(lines) + "\n"
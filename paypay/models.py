@@ -0,0 +1,110 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+class Model:
+    __slots__ = ("raw",)
+    fields = {}
+
+    def __init__(self, raw: dict) -> None:
+        self.raw = raw
+
+    def __getattr__(self, name: str):
+        path = type(self).fields.get(name)
+        if path == None or self.raw == None:
+            raise AttributeError(name)
+
+        value = self.raw
+        for key in path:
+            if not isinstance(value, dict):
+                value = None
+                break
+            value = value.get(key)
+
+        object.__setattr__(self, name, value)
+        return value
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{name}={getattr(self, name)!r}' for name in type(self).fields)})"
+
+    def compact(self) -> "Model":
+        for name in type(self).fields:
+            getattr(self, name)
+        self.raw = None
+        return self
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in type(self).fields}
+
+class Balance(Model):
+    fields = {
+        "balance": ("payload", "walletSummary", "allTotalBalanceInfo", "balance"),
+        "usable_balance": ("payload", "walletSummary", "usableBalanceInfoWithoutCashback", "balance"),
+        "money": ("payload", "walletDetail", "emoneyBalanceInfo", "balance"),
+        "money_lite": ("payload", "walletDetail", "prepaidBalanceInfo", "balance"),
+        "points": ("payload", "walletDetail", "cashBackBalanceInfo", "balance")
+    }
+    __slots__ = tuple(fields)
+
+class Profile(Model):
+    fields = {
+        "name": ("payload", "userProfile", "nickName"),
+        "external_user_id": ("payload", "userProfile", "externalUserId"),
+        "icon": ("payload", "userProfile", "avatarImageUrl")
+    }
+    __slots__ = tuple(fields)
+
+class HistoryEntry(Model):
+    fields = {
+        "order_id": ("orderId",),
+        "order_type": ("orderType",),
+        "order_status": ("orderStatus",),
+        "amount": ("amount",),
+        "description": ("description",),
+        "image_url": ("imageUrl",),
+        "transaction_at": ("transactionAt",)
+    }
+    __slots__ = tuple(fields)
+
+    @classmethod
+    def from_response(cls, response: dict) -> list:
+        return [cls(item) for item in response["payload"].get("paymentInfoList") or []]
+
+class LinkInfo(Model):
+    fields = {
+        "order_id": ("payload", "message", "data", "orderId"),
+        "order_status": ("payload", "orderStatus"),
+        "amount": ("payload", "pendingP2PInfo", "amount"),
+        "is_set_passcode": ("payload", "pendingP2PInfo", "isSetPasscode"),
+        "sender_name": ("payload", "sender", "displayName"),
+        "sender_icon": ("payload", "sender", "photoUrl"),
+        "chat_room_id": ("payload", "message", "chatRoomId"),
+        "message_id": ("payload", "message", "messageId")
+    }
+    __slots__ = tuple(fields)
+
+class P2PCode(Model):
+    fields = {
+        "code": ("payload", "p2pCode")
+    }
+    __slots__ = tuple(fields)
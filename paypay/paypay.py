@@ -22,20 +22,150 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import os
 import json
-import pkce
+import time
 import uuid
+import base64
+import tempfile
+import threading
 import datetime
-import requests
+import functools
+import itertools
 import urllib.parse
 
-from bs4 import BeautifulSoup
+from requests.cookies import create_cookie
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .cache import TTLCache
+from .journal import RequestJournal, DONE
+from .models import Model
+from .endpoints import Endpoint, HISTORY_CURSOR, PAR, AUTHORIZE, PAR_CHECK, SIGN_IN_PASSWORD, CODE_GRANT_SELECT, OTL_VERIFY, SELECT_OTP, CODE_GRANT_OTP, TOKEN, REFRESH, SIGN_OUT, BALANCE, HISTORY, PROFILE, P2P_CODE, LINK_INFO, CREATE_LINK, ACCEPT_LINK, REJECT_LINK
+from .version import VersionResolver, default_resolver
+from .transport import Transport, HTTP2Transport
 
 class PayPayError(Exception):
     pass
 
+class Request:
+    def __init__(self, method: str, url: str, params: dict = None, headers: dict = None, data: dict = None, json: dict = None, session: str = "session", decode: bool = True, schema: dict = None, endpoint: str = None) -> None:
+        self.method = method
+        self.url = url
+        self.params = params
+        self.headers = headers
+        self.data = data
+        self.json = json
+        self.session = session
+        self.decode = decode
+        self.schema = schema
+        self.endpoint = endpoint
+
+def flow(func = None, refresh: bool = True):
+    if func == None:
+        return functools.partial(flow, refresh=refresh)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        return self._call(func, refresh, args, kwargs)
+
+    wrapper.flow = func
+    return wrapper
+
+TOKEN_EXPIRED_CODES = {"S0001"}
+SEND_ORDER_TYPES = {"P2P_SEND", "P2P_SEND_MONEY_LINK"}
+RECEIVE_ORDER_TYPES = {"P2P_RECEIVE"}
+
+def token_expires_at(access_token: str, expires_in: float = None) -> float:
+    if expires_in != None:
+        return time.time() + float(expires_in)
+
+    try:
+        payload = access_token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+def load_start() -> str:
+    return str(round(time.time()))
+
+def parse_time(value: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def history_reached(item: dict, since) -> bool:
+    if since == None:
+        return False
+    if isinstance(since, datetime.datetime):
+        transaction_at = parse_time(item["transactionAt"])
+        if since.tzinfo == None:
+            transaction_at = transaction_at.astimezone().replace(tzinfo=None)
+        return transaction_at <= since
+    return item["orderId"] == since
+
+def history_page(response: dict, since = None) -> tuple:
+    items = []
+    for item in response["payload"].get("paymentInfoList") or []:
+        if history_reached(item, since):
+            return items, None
+        items.append(item)
+
+    if len(items) == 0:
+        return items, None
+    return items, response["payload"].get(HISTORY_CURSOR)
+
+def reconciled_response(payload: dict) -> dict:
+    return {"header": {"resultCode": "S0000", "resultMessage": "reconciled"}, "payload": payload}
+
+def cookie_jar(session):
+    return getattr(session.cookies, "jar", session.cookies)
+
+def dump_cookies(session) -> list:
+    return [
+        {
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path,
+            "expires": cookie.expires,
+            "secure": cookie.secure
+        }
+        for cookie in cookie_jar(session)
+    ]
+
+def load_cookies(session, cookies: list) -> None:
+    jar = cookie_jar(session)
+    for cookie in cookies:
+        jar.set_cookie(create_cookie(**cookie))
+
+def link_password(passwords, code: str) -> str:
+    if isinstance(passwords, dict):
+        return passwords.get(code)
+    return passwords
+
+def link_calls(amounts: list, keys: list = None) -> list:
+    if keys == None:
+        return [(index, amount, None) for index, amount in enumerate(amounts)]
+    return [(key, amount, key) for key, amount in zip(keys, amounts)]
+
+class LinkBudget:
+    def __init__(self, max_total: int = None) -> None:
+        self.max_total = max_total
+        self.reserved = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: int) -> bool:
+        with self._lock:
+            if self.max_total != None and self.reserved + amount > self.max_total:
+                return False
+            self.reserved += amount
+            return True
+
+    def release(self, amount: int) -> None:
+        with self._lock:
+            self.reserved -= amount
+
 class PayPay:
-    def __init__(self, access_token: str = None, device_uuid: str = str(uuid.uuid4()), client_uuid: str = str(uuid.uuid4()), proxy_conf: str = None) -> None:
+    def __init__(self, access_token: str = None, device_uuid: str = None, client_uuid: str = None, proxy_conf: str = None, paypay_version: str = None, version_resolver: VersionResolver = None, transport: Transport = None, link_cache_ttl: float = 10, refresh_token: str = None, auto_refresh: bool = True, refresh_margin: float = 300, journal: RequestJournal = None, http2: bool = False) -> None:
         if proxy_conf != None:
             self.proxy_conf = {
                 "http": proxy_conf,
@@ -44,18 +174,33 @@ class PayPay:
         else:
             self.proxy_conf = None
 
+        if device_uuid == None:
+            device_uuid = str(uuid.uuid4())
+        if client_uuid == None:
+            client_uuid = str(uuid.uuid4())
+
         self.device_uuid = device_uuid
         self.client_uuid = client_uuid
         
-        self.paypay_version = self.get_paypay_version()
-        self.session = requests.Session()
-        self._session = requests.Session()
-
-        self.params = {
-            "payPayLang": "ja"
-        }
-
-        self.headers = {
+        self.version_resolver = version_resolver if version_resolver != None else default_resolver
+        self._paypay_version = None
+        self.http2 = http2
+        self.transport = transport if transport != None else self._create_transport()
+        self._owns_transport = transport == None
+        self.session = self.transport.create_session()
+        self._session = self.transport.create_session()
+        self.link_cache = TTLCache(ttl=link_cache_ttl)
+        self.journal = journal
+
+        self.access_token = None
+        self.refresh_token = None
+        self.token_expires_at = None
+        self.auto_refresh = auto_refresh
+        self.refresh_margin = refresh_margin
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+
+        self._headers = {
             "Host": "app4.paypay.ne.jp",
             "Client-Os-Type": "ANDROID",
             "Device-Acceleration-2": "NULL",
@@ -81,28 +226,211 @@ class PayPay:
             "Accept-Charset": "UTF-8",
             "Accept": "*/*",
             "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "close",
-            "Client-Version": self.paypay_version,
-            "User-Agent": f"PaypayApp/{self.paypay_version} Android9"
+            "Connection": "keep-alive"
         }
 
+        if paypay_version != None:
+            self._set_paypay_version(paypay_version)
+
         if access_token != None:
-            self.headers["Authorization"] = f"Bearer {access_token}"
+            self._set_tokens(access_token, refresh_token)
+
+    @property
+    def paypay_version(self) -> str:
+        if self._paypay_version == None:
+            self._set_paypay_version(self.version_resolver.get())
+        return self._paypay_version
+
+    @property
+    def headers(self) -> dict:
+        if self._paypay_version == None:
+            self._set_paypay_version(self.version_resolver.get())
+        return self._headers
+
+    def _set_paypay_version(self, version: str) -> None:
+        self._headers = dict(self._headers, **{"Client-Version": version, "User-Agent": f"PaypayApp/{version} Android9"})
+        self._paypay_version = version
+
+    def to_dict(self) -> dict:
+        state = {
+            "accessToken": self.access_token,
+            "refreshToken": self.refresh_token,
+            "tokenExpiresAt": self.token_expires_at,
+            "deviceUuid": self.device_uuid,
+            "clientUuid": self.client_uuid,
+            "paypayVersion": self._paypay_version,
+            "cookies": {
+                "session": dump_cookies(self.session),
+                "_session": dump_cookies(self._session)
+            }
+        }
+        if hasattr(self, "verifier"):
+            state["verifier"] = self.verifier
+        if hasattr(self, "ext_id"):
+            state["extId"] = self.ext_id
+
+        return state
+
+    @classmethod
+    def from_dict(cls, state: dict, **kwargs) -> "PayPay":
+        paypay = cls(
+            access_token=state.get("accessToken"),
+            refresh_token=state.get("refreshToken"),
+            device_uuid=state.get("deviceUuid"),
+            client_uuid=state.get("clientUuid"),
+            paypay_version=kwargs.pop("paypay_version", state.get("paypayVersion")),
+            **kwargs
+        )
+        if state.get("tokenExpiresAt") != None:
+            paypay.token_expires_at = state["tokenExpiresAt"]
+        for name, cookies in state.get("cookies", {}).items():
+            load_cookies(getattr(paypay, name), cookies)
+        if "verifier" in state:
+            paypay.verifier = state["verifier"]
+        if "extId" in state:
+            paypay.ext_id = state["extId"]
+
+        return paypay
+
+    def save_state(self, path: str) -> None:
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(self.to_dict(), file)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def load_state(cls, path: str, **kwargs) -> "PayPay":
+        with open(path, "r", encoding="utf-8") as file:
+            return cls.from_dict(json.load(file), **kwargs)
+
+    def _set_tokens(self, access_token: str, refresh_token: str = None, expires_in: float = None) -> None:
+        self.access_token = access_token
+        if refresh_token != None:
+            self.refresh_token = refresh_token
+        self.token_expires_at = token_expires_at(access_token, expires_in)
+        self._headers = dict(self._headers, Authorization=f"Bearer {access_token}")
+
+    def _set_tokens_from(self, response: dict) -> None:
+        payload = response["payload"]
+        self._set_tokens(payload["accessToken"], payload.get("refreshToken"), payload.get("expiresIn"))
+
+    def _token_expiring(self) -> bool:
+        return self.token_expires_at != None and time.time() >= self.token_expires_at - self.refresh_margin
+
+    def _can_refresh(self, refresh: bool) -> bool:
+        return refresh and self.auto_refresh and self.refresh_token != None
 
     def get_paypay_version(self) -> str:
-        response = requests.get("https://apps.apple.com/jp/app/paypay-%E3%83%9A%E3%82%A4%E3%83%9A%E3%82%A4/id1435783608")
-        soup = BeautifulSoup(response.text, "html.parser")
-        base_element = json.loads(list(json.loads(soup.find("script", attrs={"id": "shoebox-media-api-cache-apps"}).text).values())[0])
-        version = base_element["d"][0]["attributes"]["platformAttributes"]["ios"]["versionHistory"][0]["versionDisplay"]
-        return version
+        return self.version_resolver.refresh()
+
+    def prewarm(self, connections: int = 1) -> None:
+        self.transport.prewarm(self.session, connections=connections, proxies=self.proxy_conf)
+
+    def __enter__(self) -> "PayPay":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._owns_transport:
+            self.transport.close()
+
+    def _create_transport(self) -> Transport:
+        if self.http2:
+            try:
+                return HTTP2Transport(proxy=self.proxy_conf["https"] if self.proxy_conf != None else None)
+            except ImportError:
+                pass
+        return Transport()
+
+    def _call(self, func, refresh: bool, args: tuple, kwargs: dict):
+        if not self._can_refresh(refresh):
+            return self._run(func(self, *args, **kwargs))
+
+        if self._token_expiring():
+            if time.time() >= self.token_expires_at:
+                self._refresh_tokens(self.access_token)
+            else:
+                self._refresh_tokens_background()
+
+        access_token = self.access_token
+        try:
+            return self._run(func(self, *args, **kwargs))
+        except PayPayError as error:
+            if not error.args[0] in TOKEN_EXPIRED_CODES:
+                raise
+
+        self._refresh_tokens(access_token)
+        return self._run(func(self, *args, **kwargs))
+
+    def _refresh_tokens(self, access_token: str) -> None:
+        with self._refresh_lock:
+            if self.access_token == access_token:
+                self.login_refresh()
+
+    def _refresh_tokens_background(self) -> None:
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        threading.Thread(target=self._refresh_tokens_worker, args=(self.access_token,), daemon=True).start()
+
+    def _refresh_tokens_worker(self, access_token: str) -> None:
+        try:
+            self._refresh_tokens(access_token)
+        except Exception:
+            pass
+        finally:
+            self._refreshing = False
+
+    def _run(self, generator):
+        response = None
+        try:
+            while True:
+                request = generator.send(response)
+                response = self._send(request)
+        except StopIteration as result:
+            return result.value
+
+    def _request(self, endpoint: Endpoint, headers: dict = None, params: dict = None, data: dict = None, json: dict = None) -> Request:
+        if endpoint.headers == None:
+            base = self.headers
+        else:
+            base = endpoint.compile(self.paypay_version)
+        if headers != None:
+            base = {**base, **headers}
+
+        return Request(
+            endpoint.method,
+            endpoint.url,
+            params=params if params != None else endpoint.params,
+            headers=base,
+            data=data,
+            json=json,
+            session=endpoint.session,
+            decode=endpoint.decode,
+            schema=endpoint.schema,
+            endpoint=endpoint.name
+        )
+
+    def _send(self, request: Request):
+        return self.transport.send(getattr(self, request.session), request, proxies=self.proxy_conf)
     
+    @flow(refresh=False)
     def login_start(self, phone_number: str, password: str) -> None:
+        import pkce
+
         self.verifier, self.challenge = pkce.generate_pkce_pair(code_verifier_length=43)
 
-        response = self.session.post(
-            "https://app4.paypay.ne.jp/bff/v2/oauth2/par",
-            params=self.params,
-            headers=self.headers,
+        response = yield self._request(
+            PAR,
             data={
                 "clientId": "pay2-mobile-app-client",
                 "clientAppVersion": self.paypay_version,
@@ -117,155 +445,44 @@ class PayPay:
                 "tokenVersion": "v2",
                 "prompt": "",
                 "uiLocales": "ja"
-            },
-            proxies=self.proxy_conf
-        ).json()
+            }
+        )
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         request_uri = response["payload"]["requestUri"]
 
-        self.session.get(
-            "https://www.paypay.ne.jp/portal/api/v2/oauth2/authorize",
+        yield self._request(
+            AUTHORIZE,
             params={
                 "client_id": "pay2-mobile-app-client",
                 "request_uri": request_uri
-            },
-            headers={
-                "Host": "www.paypay.ne.jp",
-                "Pragma": "no-cache",
-                "Cache-Control": "no-cache",
-                "Upgrade-Insecure-Requests": "1",
-                "User-Agent": f"Mozilla/5.0 (Linux; Android 9; SM-G955N Build/NRD90M.G955NKSU1AQDC; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/92.0.4515.131 Mobile Safari/537.36 jp.pay2.app.android/{self.paypay_version}",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
-                "X-Requested-With": "jp.ne.paypay.android.app",
-                "Sec-Fetch-Site": "none",
-                "Sec-Fetch-Mode": "navigate",
-                "Sec-Fetch-User": "?1",
-                "Sec-Fetch-Dest": "document",
-                "Accept-Encoding": "gzip, deflate",
-                "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7",
-                "Connection": "close"
-            },
-            proxies=self.proxy_conf
+            }
         )
 
-        response = self.session.get(
-            "https://www.paypay.ne.jp/portal/api/v2/oauth2/par/check",
-            headers={
-                "Host": "www.paypay.ne.jp",
-                "Pragma": "no-cache",
-                "Cache-Control": "no-cache",
-                "User-Agent": f"Mozilla/5.0 (Linux; Android 9; SM-G955N Build/NRD90M.G955NKSU1AQDC; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/92.0.4515.131 Mobile Safari/537.36 jp.pay2.app.android/{self.paypay_version}",
-                "Accept": "application/json, text/plain, */*",
-                "Client-Os-Version": "28.0.0",
-                "Client-Version": self.paypay_version,
-                "Client-Type": "PAYPAYAPP",
-                "Client-App-Load-Start": str(round(datetime.datetime.now().timestamp())),
-                "Client-Id": "pay2-mobile-app-client",
-                "Sentry-Trace": "NULL",
-                "Baggage": "NULL",
-                "X-Requested-With": "jp.ne.paypay.android.app",
-                "Sec-Fetch-Site": "same-origin",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-User": "empty",
-                "Referer": "https://www.paypay.ne.jp/portal/oauth2/sign-in?client_id=pay2-mobile-app-client&mode=landing",
-                "Accept-Encoding": "gzip, deflate",
-                "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7"
-            },
-            proxies=self.proxy_conf
-        ).json()
+        response = yield self._request(PAR_CHECK, headers={"Client-App-Load-Start": load_start()})
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
 
-        response = self.session.post(
-            "https://www.paypay.ne.jp/portal/api/v2/oauth2/sign-in/password",
-            headers={
-                "Host": "www.paypay.ne.jp",
-                "Pragma": "no-cache",
-                "Cache-Control": "no-cache",
-                "Client-Os-Version": "28.0.0",
-                "Client-Version": self.paypay_version,
-                "User-Agent": f"Mozilla/5.0 (Linux; Android 9; SM-G955N Build/NRD90M.G955NKSU1AQDC; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/92.0.4515.131 Mobile Safari/537.36 jp.pay2.app.android/{self.paypay_version}",
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                "Client-App-Load-Start": str(round(datetime.datetime.now().timestamp())),
-                "Client-Type": "PAYPAYAPP",
-                "Sentry-Trace": "NULL",
-                "Baggage": "NULL",
-                "Origin": "https://www.paypay.ne.jp",
-                "X-Requested-With": "jp.ne.paypay.android.app",
-                "Sec-Fetch-Site": "same-origin",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Dest": "empty",
-                "Referer": "https://www.paypay.ne.jp/portal/oauth2/sign-in?client_id=pay2-mobile-app-client&mode=landing",
-                "Accept-Encoding": "gzip, deflate",
-                "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7",
-            },
+        response = yield self._request(
+            SIGN_IN_PASSWORD,
+            headers={"Client-App-Load-Start": load_start()},
             json={
                 "username": phone_number,
                 "password": password,
                 "signInAttemptCount": 1
-            },
-            proxies=self.proxy_conf
-        ).json()
+            }
+        )
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         
-        response = self.session.post(
-            "https://www.paypay.ne.jp/portal/api/v2/oauth2/extension/code-grant/update",
-            headers={
-                "Host": "www.paypay.ne.jp",
-                "Pragma": "no-cache",
-                "Cache-Control": "no-cache",
-                "Client-Os-Version": "28.0.0",
-                "Client-Version": self.paypay_version,
-                "User-Agent": f"Mozilla/5.0 (Linux; Android 9; SM-G955N Build/NRD90M.G955NKSU1AQDC; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/92.0.4515.131 Mobile Safari/537.36 jp.pay2.app.android/{self.paypay_version}",
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                "Client-Type": "PAYPAYAPP",
-                "Client-App-Load-Start": str(round(datetime.datetime.now().timestamp())),
-                "Sentry-Trace": "NULL",
-                "Baggage": "NULL",
-                "Origin": "https://www.paypay.ne.jp",
-                "X-Requested-With": "jp.ne.paypay.android.app",
-                "Sec-Fetch-Site": "same-origin",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Dest": "empty",
-                "Referer": "https://www.paypay.ne.jp/portal/oauth2/sign-in?client_id=pay2-mobile-app-client&mode=landing",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7"
-            },
-            json={},
-            proxies=self.proxy_conf
-        ).json()
+        response = yield self._request(CODE_GRANT_SELECT, headers={"Client-App-Load-Start": load_start()}, json={})
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         self.ext_id = response["payload"]["request"]["extension_id"]
 
-        response = self.session.post(
-            "https://www.paypay.ne.jp/portal/api/v2/oauth2/extension/code-grant/update",
-            headers={
-                "Host": "www.paypay.ne.jp",
-                "Pragma": "no-cache",
-                "Cache-Control": "no-cache",
-                "Client-Os-Version": "28.0.0",
-                "Client-Version": self.paypay_version,
-                "User-Agent": f"Mozilla/5.0 (Linux; Android 9; SM-G955N Build/NRD90M.G955NKSU1AQDC; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/92.0.4515.131 Mobile Safari/537.36 jp.pay2.app.android/{self.paypay_version}",
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                "Client-Type": "PAYPAYAPP",
-                "Client-App-Load-Start": str(round(datetime.datetime.now().timestamp())),
-                "Sentry-Trace": "NULL",
-                "Baggage": "NULL",
-                "Origin": "https://www.paypay.ne.jp",
-                "X-Requested-With": "jp.ne.paypay.android.app",
-                "Sec-Fetch-Site": "same-origin",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Dest": "empty",
-                "Referer": "https://www.paypay.ne.jp/portal/oauth2/sign-in?client_id=pay2-mobile-app-client&mode=landing",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7"
-            },
+        response = yield self._request(
+            CODE_GRANT_SELECT,
+            headers={"Client-App-Load-Start": load_start()},
             json={
                 "params": {
                     "extension_id": self.ext_id,
@@ -278,151 +495,39 @@ class PayPay:
                         }
                     }
                 }
-            },
-            proxies=self.proxy_conf
-        ).json()
+            }
+        )
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
 
+    @flow(refresh=False)
     def login_confirm(self, login_accept_url: str) -> dict:
         if not all(key in self.session.cookies for key in ["Lang", "__Secure-request_uri"]):
             raise PayPayError(None, "先にログインを開始してください")
         
         code = dict(urllib.parse.parse_qsl(urllib.parse.urlparse(login_accept_url).query))["id"]
 
-        response = self._session.post(
-            "https://www.paypay.ne.jp/portal/api/v2/oauth2/extension/sign-in/2fa/otl/verify",
-            headers={
-                "Host": "www.paypay.ne.jp",
-                "Pragma": "no-cache",
-                "Cache-Control": "no-cache",
-                "Client-Os-Version": "28.0.0",
-                "User-Agent": f"Mozilla/5.0 (Linux; Android 9; SM-G955N Build/NRD90M.G955NKSU1AQDC; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/92.0.4515.131 Mobile Safari/537.36 jp.pay2.app.android/{self.paypay_version}",
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                "Client-Type": "PAYPAYWEB",
-                "Sentry-Trace": "NULL",
-                "Baggage": "NULL",
-                "Origin": "https://www.paypay.ne.jp",
-                "Sec-Fetch-Site": "same-origin",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Dest": "empty",
-                "Referer": login_accept_url,
-                "Accept-Encoding": "gzip, deflate, br, zstd",
-                "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7",
-            },
-            json={
-                "code": code,
-            },
-            proxies=self.proxy_conf
-        ).json()
+        response = yield self._request(OTL_VERIFY, headers={"Referer": login_accept_url}, json={"code": code})
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         
         otl_code = response["payload"]["otlCode"]
         
-        response = self._session.post(
-            "https://www.paypay.ne.jp/portal/api/v2/oauth2/extension/sign-in/2fa/otl/verify",
-            headers={
-                "Host": "www.paypay.ne.jp",
-                "Pragma": "no-cache",
-                "Cache-Control": "no-cache",
-                "Client-Os-Version": "28.0.0",
-                "User-Agent": f"Mozilla/5.0 (Linux; Android 9; SM-G955N Build/NRD90M.G955NKSU1AQDC; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/92.0.4515.131 Mobile Safari/537.36 jp.pay2.app.android/{self.paypay_version}",
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                "Client-Type": "PAYPAYWEB",
-                "Sentry-Trace": "NULL",
-                "Baggage": "NULL",
-                "Origin": "https://www.paypay.ne.jp",
-                "Sec-Fetch-Site": "same-origin",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Dest": "empty",
-                "Referer": login_accept_url,
-                "Accept-Encoding": "gzip, deflate, br, zstd",
-                "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7",
-            },
-            json={
-                "code": otl_code
-            },
-            proxies=self.proxy_conf
-        ).json()
+        response = yield self._request(OTL_VERIFY, headers={"Referer": login_accept_url}, json={"code": otl_code})
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
 
         otp = response["payload"]["otp"]
 
-        self.session.get(
-            "https://www.paypay.ne.jp/portal/oauth2/extension-select-otp",
-            headers={
-                "Host": "www.paypay.ne.jp",
-                "Pragma": "no-cache",
-                "Cache-Control": "no-cache",
-                "Upgrade-Insecure-Requests": "1",
-                "User-Agent": f"Mozilla/5.0 (Linux; Android 9; SM-G955N Build/NRD90M.G955NKSU1AQDC; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/92.0.4515.131 Mobile Safari/537.36 jp.pay2.app.android/{self.paypay_version}",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
-                "X-Requested-With": "jp.ne.paypay.android.app",
-                "Sec-Fetch-Site": "none",
-                "Sec-Fetch-Mode": "navigate",
-                "Sec-Fetch-User": "?1",
-                "Sec-Fetch-Dest": "document",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7"
-            },
-            proxies=self.proxy_conf
-        )
+        yield self._request(SELECT_OTP)
         
-        response = self.session.get(
-            "https://www.paypay.ne.jp/portal/api/v2/oauth2/par/check",
-            headers={
-                "Host": "www.paypay.ne.jp",
-                "Pragma": "no-cache",
-                "Cache-Control": "no-cache",
-                "User-Agent": f"Mozilla/5.0 (Linux; Android 9; SM-G955N Build/NRD90M.G955NKSU1AQDC; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/92.0.4515.131 Mobile Safari/537.36 jp.pay2.app.android/{self.paypay_version}",
-                "Accept": "application/json, text/plain, */*",
-                "Client-Os-Version": "28.0.0",
-                "Client-Version": self.paypay_version,
-                "Client-Type": "PAYPAYAPP",
-                "Client-App-Load-Start": str(round(datetime.datetime.now().timestamp())),
-                "Client-Id": "pay2-mobile-app-client",
-                "Sentry-Trace": "NULL",
-                "Baggage": "NULL",
-                "X-Requested-With": "jp.ne.paypay.android.app",
-                "Sec-Fetch-Site": "same-origin",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-User": "empty",
-                "Referer": "https://www.paypay.ne.jp/portal/oauth2/sign-in?client_id=pay2-mobile-app-client&mode=landing",
-                "Accept-Encoding": "gzip, deflate",
-                "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7"
-            },
-            proxies=self.proxy_conf
-        ).json()
+        response = yield self._request(PAR_CHECK, headers={"Client-App-Load-Start": load_start()})
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         
-        response = self.session.post(
-            "https://www.paypay.ne.jp/portal/api/v2/oauth2/extension/code-grant/update",
-            headers={
-                "Host": "www.paypay.ne.jp",
-                "Pragma": "no-cache",
-                "Cache-Control": "no-cache",
-                "User-Agent": f"Mozilla/5.0 (Linux; Android 9; SM-G955N Build/NRD90M.G955NKSU1AQDC; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/92.0.4515.131 Mobile Safari/537.36 jp.pay2.app.android/{self.paypay_version}",
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                "Client-Os-Version": "28.0.0",
-                "Client-Version": self.paypay_version,
-                "Client-Type": "PAYPAYAPP",
-                "Client-App-Load-Start": str(round(datetime.datetime.now().timestamp())),
-                "Sentry-Trace": "NULL",
-                "Baggage": "NULL",
-                "X-Requested-With": "jp.ne.paypay.android.app",
-                "Sec-Fetch-Site": "same-origin",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-User": "empty",
-                "Referer": "https://www.paypay.ne.jp/portal/oauth2/sign-in?client_id=pay2-mobile-app-client&mode=landing",
-                "Accept-Encoding": "gzip, deflate",
-                "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7"
-            },
+        response = yield self._request(
+            CODE_GRANT_OTP,
+            headers={"Client-App-Load-Start": load_start()},
             json={
                 "params": {
                     "extension_id": self.ext_id,
@@ -431,35 +536,14 @@ class PayPay:
                         "payload": None
                     }
                 }
-            },
-            proxies=self.proxy_conf
-        ).json()
+            }
+        )
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         
-        response = self.session.post(
-            "https://www.paypay.ne.jp/portal/api/v2/oauth2/extension/code-grant/update",
-            headers={
-                "Host": "www.paypay.ne.jp",
-                "Pragma": "no-cache",
-                "Cache-Control": "no-cache",
-                "User-Agent": f"Mozilla/5.0 (Linux; Android 9; SM-G955N Build/NRD90M.G955NKSU1AQDC; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/92.0.4515.131 Mobile Safari/537.36 jp.pay2.app.android/{self.paypay_version}",
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/plain, */*",
-                "Client-Os-Version": "28.0.0",
-                "Client-Version": self.paypay_version,
-                "Client-Type": "PAYPAYAPP",
-                "Client-App-Load-Start": str(round(datetime.datetime.now().timestamp())),
-                "Sentry-Trace": "NULL",
-                "Baggage": "NULL",
-                "X-Requested-With": "jp.ne.paypay.android.app",
-                "Sec-Fetch-Site": "same-origin",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-User": "empty",
-                "Referer": "https://www.paypay.ne.jp/portal/oauth2/sign-in?client_id=pay2-mobile-app-client&mode=landing",
-                "Accept-Encoding": "gzip, deflate",
-                "Accept-Language": "ja-JP,ja;q=0.9,en-US;q=0.8,en;q=0.7"
-            },
+        response = yield self._request(
+            CODE_GRANT_OTP,
+            headers={"Client-App-Load-Start": load_start()},
             json={
                 "params": {
                     "extension_id": self.ext_id,
@@ -470,34 +554,32 @@ class PayPay:
                         }
                     }
                 }
-            },
-            proxies=self.proxy_conf
-        ).json()
+            }
+        )
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         code = dict(urllib.parse.parse_qsl(urllib.parse.urlparse(response["payload"]["redirect_uri"]).query))["code"]
 
-        response = self.session.post(
-            "https://app4.paypay.ne.jp/bff/v2/oauth2/token",
-            params=self.params,
-            headers=self.headers,
+        response = yield self._request(
+            TOKEN,
             data={
                 "clientId": "pay2-mobile-app-client",
                 "redirectUri": "paypay://oauth2/callback",
                 "code": code,
                 "codeVerifier": self.verifier
-            },
-            proxies=self.proxy_conf
-        ).json()
+            }
+        )
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         
-        token = response["payload"]["accessToken"]
-        self.headers["Authorization"] = f"Bearer {token}"
+        self._set_tokens_from(response)
 
         return response
 
+    @flow(refresh=False)
     def login_refresh(self, refresh_token: str = None) -> dict:
+        if refresh_token == None:
+            refresh_token = self.refresh_token
         if refresh_token == None:
             raise PayPayError(None, "リフレッシュトークンが設定されていません")
         
@@ -505,60 +587,45 @@ class PayPay:
         if access_token == None:
             raise PayPayError(None, "アクセストークンが設定されていません")
 
-        response = self.session.post(
-            "https://app4.paypay.ne.jp/bff/v2/oauth2/refresh",
-            headers=self.headers,
+        response = yield self._request(
+            REFRESH,
             data={
                 "clientId": "pay2-mobile-app-client",
                 "refreshToken": refresh_token,
                 "tokenVersion": "v2"
-            },
-            proxies=self.proxy_conf
+            }
         )
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
+        self._set_tokens_from(response)
         
         return response
     
+    @flow(refresh=False)
     def logout(self) -> dict:
         access_token = self.headers.get("Authorization")
         if access_token == None:
             raise PayPayError(None, "アクセストークンが設定されていません")
         
-        response = self.session.post(
-            "https://app4.paypay.ne.jp/bff/v1/signOut",
-            params=self.params,
-            json={},
-            proxies=self.proxy_conf
-        )
+        response = yield self._request(SIGN_OUT, json={})
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         
         return response
     
+    @flow
     def get_balance(self) -> dict:
         if not "Authorization" in self.headers:
             raise PayPayError(None, "先にログインを行ってください")
 
-        response = self.session.get(
-            "https://app4.paypay.ne.jp/bff/v1/getBalanceInfo",
-            params={
-                "includePendingBonusLite": "false",
-                "includePending": "true",
-                "includePreAuth": "true",
-                "noCache": "true",
-                "includeKycInfo": "true",
-                "payPayLang": "ja"
-            },
-            headers=self.headers,
-            proxies=self.proxy_conf
-        ).json()
+        response = yield self._request(BALANCE)
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         
         return response
     
-    def get_history(self, size: int = 20, cashback: bool = False) -> dict:
+    @flow
+    def get_history(self, size: int = 20, cashback: bool = False, cursor: str = None) -> dict:
         if not "Authorization" in self.headers:
             raise PayPayError(None, "先にログインを行ってください")
         
@@ -568,76 +635,63 @@ class PayPay:
         }
         if cashback:
             params["orderTypes"] = "CASHBACK"
+        if cursor != None:
+            params[HISTORY_CURSOR] = cursor
 
-        response = self.session.get(
-            f"https://app4.paypay.ne.jp/bff/v3/getPaymentHistory",
-            params=params,
-            headers=self.headers,
-            proxies=self.proxy_conf
-        ).json()
+        response = yield self._request(HISTORY, params=params)
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         
         return response
     
+    @flow
     def get_profile(self) -> dict:
         if not "Authorization" in self.headers:
             raise PayPayError(None, "先にログインを行ってください")
 
-        response = self.session.get(
-            "https://app4.paypay.ne.jp/bff/v2/getProfileDisplayInfo",
-            params={
-                "includeExternalProfileSync": "true",
-                "payPayLang": "ja"
-            },
-            headers=self.headers,
-            proxies=self.proxy_conf
-        ).json()
+        response = yield self._request(PROFILE)
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
 
         return response
     
+    @flow
     def get_p2p_code(self, session_id: str = None) -> dict:
         if not "Authorization" in self.headers:
             raise PayPayError(None, "先にログインを行ってください")
 
-        response = self.session.post(
-            f"https://app4.paypay.ne.jp/bff/v1/createP2PCode",
-            params={
-                "payPayLang": "ja"
-            },
-            headers=self.headers,
+        response = yield self._request(
+            P2P_CODE,
             json={
                 "amount": None,
                 "sessionId": session_id
-            },
-            proxies=self.proxy_conf
-        ).json()
+            }
+        )
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         
         return response
     
+    @flow
     def get_link(self, code: str) -> dict:
         if not "Authorization" in self.headers:
             raise PayPayError(None, "先にログインを行ってください")
         
-        response = requests.get(
-            "https://app4.paypay.ne.jp/bff/v2/getP2PLinkInfo",
+        response = yield self._request(
+            LINK_INFO,
             params={
                 "verificationCode": code,
                 "payPayLang": "ja"
-            },
-            headers=self.headers,
-            proxies=self.proxy_conf
-        ).json()
+            }
+        )
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
+        self.link_cache.set(code, response)
         
         return response
     
-    def create_link(self, amount: int = 1, password: str = None) -> dict:
+    @flow
+    def create_link(self, amount: int = 1, password: str = None, key: str = None) -> dict:
         if not "Authorization" in self.headers:
             raise PayPayError(None, "先にログインを行ってください")
 
@@ -647,36 +701,34 @@ class PayPay:
             "theme": "default-sendmoney",
             "requestAt": datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ")
         }
+        entry = self._journal_begin("create_link", key, payload)
+        if entry != None:
+            if entry["status"] == DONE:
+                return entry["result"]
+            payload = dict(entry["payload"])
         if password != None:
             payload["passcode"] = password
 
-        response = requests.post(
-            "https://app4.paypay.ne.jp/bff/v2/executeP2PSendMoneyLink",
-            params=self.params,
-            headers=self.headers,
-            json=payload,
-            proxies=self.proxy_conf
-        ).json()
+        response = yield self._request(CREATE_LINK, json=payload)
+        self._journal_finish(entry, response)
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         
         return response
     
-    def accept_link(self, code: str, password: str = None) -> dict:
+    @flow
+    def accept_link(self, code: str, password: str = None, link_info: dict = None, key: str = None) -> dict:
         if not "Authorization" in self.headers:
             raise PayPayError(None, "先にログインを行ってください")
+
+        if key == None:
+            key = code
+        if self.journal != None:
+            entry = self.journal.get("accept_link", key)
+            if entry != None and entry["status"] == DONE:
+                return entry["result"]
         
-        response = requests.get(
-            "https://app4.paypay.ne.jp/bff/v2/getP2PLinkInfo",
-            params={
-                "verificationCode": code,
-                "payPayLang": "ja"
-            },
-            headers=self.headers,
-            proxies=self.proxy_conf
-        ).json()
-        if response["header"]["resultCode"] != "S0000":
-            raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
+        response = yield from self._get_link_info(code, link_info)
         if response["payload"]["orderStatus"] != "PENDING":
             raise PayPayError(None, "リンクは既に受け取り済みであるか辞退済みです")
         elif response["payload"]["pendingP2PInfo"]["isSetPasscode"] and password == None:
@@ -690,43 +742,30 @@ class PayPay:
             "senderChannelUrl": response["payload"]["message"]["chatRoomId"],
             "senderMessageId": response["payload"]["message"]["messageId"]
         }
+        entry = self._journal_begin("accept_link", key, payload)
+        if entry != None:
+            payload = dict(entry["payload"])
         if response["payload"]["pendingP2PInfo"]["isSetPasscode"]:
             payload["passcode"] = password
         
-        response = requests.post(
-            "https://app4.paypay.ne.jp/bff/v2/acceptP2PSendMoneyLink",
-            params=self.params,
-            headers=self.headers,
-            json=payload,
-            proxies=self.proxy_conf
-        ).json()
+        response = yield self._request(ACCEPT_LINK, json=payload)
+        self._journal_finish(entry, response)
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         
         return response
     
-    def reject_link(self, code: str) -> dict:
+    @flow
+    def reject_link(self, code: str, link_info: dict = None) -> dict:
         if not "Authorization" in self.headers:
             raise PayPayError(None, "先にログインを行ってください")
         
-        response = requests.get(
-            "https://app4.paypay.ne.jp/bff/v2/getP2PLinkInfo",
-            params={
-                "verificationCode": code,
-                "payPayLang": "ja"
-            },
-            headers=self.headers,
-            proxies=self.proxy_conf
-        ).json()
-        if response["header"]["resultCode"] != "S0000":
-            raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
+        response = yield from self._get_link_info(code, link_info)
         if response["payload"]["orderStatus"] != "PENDING":
             raise PayPayError(None, "リンクは既に受け取り済みであるか辞退済みです")
         
-        response = requests.post(
-            "https://app4.paypay.ne.jp/bff/v2/rejectP2PSendMoneyLink",
-            params=self.params,
-            headers=self.headers,
+        response = yield self._request(
+            REJECT_LINK,
             json={
                 "verificationCode": code,
                 "requestId": str(uuid.uuid4()),
@@ -734,10 +773,139 @@ class PayPay:
                 "orderId": response["payload"]["message"]["data"]["orderId"],
                 "senderChannelUrl": response["payload"]["message"]["chatRoomId"],
                 "senderMessageId": response["payload"]["message"]["messageId"]
-            },
-            proxies=self.proxy_conf
-        ).json()
+            }
+        )
         if response["header"]["resultCode"] != "S0000":
             raise PayPayError(response["header"]["resultCode"], response["header"]["resultMessage"])
         
-        return response
\ No newline at end of file
+        return response
+
+    @flow
+    def reconcile(self, grace: float = 600) -> list:
+        if self.journal == None:
+            raise PayPayError(None, "ジャーナルが設定されていません")
+
+        entries = self.journal.pending()
+        history = None
+        matched = set()
+        for entry in entries:
+            expired = time.time() - entry["created_at"] >= grace
+            if history == None:
+                since = min(entry["created_at"] for entry in entries) - 60
+                history = yield from self._history_since(datetime.datetime.fromtimestamp(since, datetime.timezone.utc))
+
+            if entry["operation"] == "accept_link":
+                code = entry["payload"]["verificationCode"]
+                try:
+                    response = yield from self.get_link.flow(self, code)
+                except PayPayError:
+                    continue
+                self.link_cache.pop(code)
+                status = response["payload"]["orderStatus"]
+                if status == "PENDING":
+                    self.journal.fail(entry["request_id"], "PENDING")
+                elif status != "COMPLETED":
+                    self.journal.fail(entry["request_id"], status)
+                elif any(item["orderId"] == entry["payload"]["orderId"] and item.get("orderType") in RECEIVE_ORDER_TYPES for item in history):
+                    self.journal.complete(entry["request_id"], reconciled_response({"orderStatus": status, "orderId": entry["payload"]["orderId"]}))
+                elif expired:
+                    self.journal.fail(entry["request_id"], "NOT_RECEIVED")
+
+            elif entry["operation"] == "create_link":
+                for item in history:
+                    if item["orderId"] in matched or item.get("orderType") not in SEND_ORDER_TYPES:
+                        continue
+                    if abs(item.get("amount") or 0) != entry["payload"]["amount"]:
+                        continue
+                    transaction_at = parse_time(item["transactionAt"]).timestamp()
+                    if transaction_at < entry["created_at"] - 60 or transaction_at > entry["created_at"] + grace:
+                        continue
+                    matched.add(item["orderId"])
+                    self.journal.complete(entry["request_id"], reconciled_response({"requestId": entry["request_id"], "orderId": item["orderId"], "link": None}))
+                    break
+                else:
+                    if expired:
+                        self.journal.fail(entry["request_id"], "NOT_FOUND")
+
+        return [self.journal.find(entry["request_id"]) for entry in entries]
+
+    def _history_since(self, since: datetime.datetime):
+        items = []
+        cursor = None
+        while True:
+            page, cursor = history_page((yield from self.get_history.flow(self, 50, False, cursor)), since)
+            items.extend(page)
+            if cursor == None:
+                return items
+
+    def _journal_begin(self, operation: str, key: str, payload: dict) -> dict:
+        if self.journal == None:
+            return None
+        return self.journal.begin(operation, key if key != None else payload["requestId"], payload)
+
+    def _journal_finish(self, entry: dict, response: dict) -> None:
+        if entry == None:
+            return
+        if response["header"]["resultCode"] == "S0000":
+            self.journal.complete(entry["request_id"], response)
+        else:
+            self.journal.fail(entry["request_id"], response["header"]["resultCode"])
+
+    def _get_link_info(self, code: str, link_info: dict = None):
+        if isinstance(link_info, Model):
+            link_info = link_info.raw
+        cached = self.link_cache.pop(code)
+        if link_info == None:
+            link_info = cached
+        if link_info == None:
+            link_info = yield from self.get_link.flow(self, code)
+            self.link_cache.pop(code)
+
+        return link_info
+
+    def iter_history(self, size: int = 20, cashback: bool = False, since = None):
+        cursor = None
+        while True:
+            items, cursor = history_page(self.get_history(size, cashback, cursor), since)
+            yield from items
+            if cursor == None:
+                return
+
+    def accept_links(self, codes: list, passwords = None, concurrency: int = 8):
+        return self._map_links(self.accept_link, [(code, link_password(passwords, code)) for code in codes], concurrency)
+
+    def reject_links(self, codes: list, concurrency: int = 8):
+        return self._map_links(self.reject_link, [(code,) for code in codes], concurrency)
+
+    def create_links(self, amounts: list, password: str = None, concurrency: int = 8, max_total: int = None, keys: list = None):
+        budget = LinkBudget(max_total)
+        return self._map_links(functools.partial(self._create_budgeted_link, budget, password), link_calls(amounts, keys), concurrency)
+
+    def _create_budgeted_link(self, budget: LinkBudget, password: str, key, amount: int, journal_key: str) -> dict:
+        if not budget.reserve(amount):
+            raise PayPayError(None, "合計金額の上限を超えるため作成しませんでした")
+        try:
+            return self.create_link(amount, password, key=journal_key)
+        except PayPayError:
+            budget.release(amount)
+            raise
+
+    def _map_links(self, func, calls: list, concurrency: int):
+        calls = iter(calls)
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        futures = {}
+        try:
+            for args in itertools.islice(calls, concurrency):
+                futures[executor.submit(func, *args)] = args[0]
+            while len(futures) > 0:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = futures.pop(future)
+                    for args in itertools.islice(calls, 1):
+                        futures[executor.submit(func, *args)] = args[0]
+                    try:
+                        yield key, future.result()
+                    except Exception as error:
+                        yield key, error
+        finally:
+            executor.shutdown(cancel_futures=True)
\ No newline at end of file
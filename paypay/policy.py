@@ -0,0 +1,57 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import random
+
+IDEMPOTENT_ENDPOINTS = ("balance", "history", "profile", "link_info")
+
+class Policy:
+    def __init__(self, connect_timeout: float = 5, read_timeout: float = 30, retries: int = 0, backoff: float = 0.2, max_backoff: float = 5, retry_codes: tuple = (), hedge_after: float = None) -> None:
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_codes = frozenset(retry_codes)
+        self.hedge_after = hedge_after
+
+    def __repr__(self) -> str:
+        return f"Policy(connect_timeout={self.connect_timeout}, read_timeout={self.read_timeout}, retries={self.retries}, hedge_after={self.hedge_after})"
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def should_retry(self, response) -> bool:
+        if len(self.retry_codes) == 0 or not isinstance(response, dict):
+            return False
+        return (response.get("header") or {}).get("resultCode") in self.retry_codes
+
+DEFAULT_POLICY = Policy()
+READ_POLICY = Policy(retries=2)
+
+def default_policies() -> dict:
+    return {endpoint: READ_POLICY for endpoint in IDEMPOTENT_ENDPOINTS}
+
+def hedged_reads(hedge_after: float, retries: int = 2, **kwargs) -> dict:
+    return {endpoint: Policy(retries=retries, hedge_after=hedge_after, **kwargs) for endpoint in IDEMPOTENT_ENDPOINTS}
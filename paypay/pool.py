@@ -0,0 +1,144 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import zlib
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .paypay import PayPay, PayPayError
+from .version import VersionResolver, default_resolver
+from .transport import Transport
+
+STRATEGIES = ("round_robin", "least_loaded")
+
+class PayPayPool:
+    def __init__(self, access_tokens: list = None, strategy: str = "round_robin", transport: Transport = None, paypay_version: str = None, version_resolver: VersionResolver = None, max_workers: int = 16, proxy_conf: str = None) -> None:
+        if not strategy in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}")
+
+        self.strategy = strategy
+        self.transport = transport if transport != None else Transport(pool_maxsize=max_workers)
+        self._owns_transport = transport == None
+        self.paypay_version = paypay_version
+        self.version_resolver = version_resolver if version_resolver != None else default_resolver
+        self.max_workers = max_workers
+        self.proxy_conf = proxy_conf
+
+        self.accounts = {}
+        self._keys = []
+        self._load = {}
+        self._cursor = 0
+        self._lock = threading.Lock()
+
+        for access_token in access_tokens or []:
+            self.add(access_token)
+
+    def __enter__(self) -> "PayPayPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def add(self, access_token: str = None, key = None, **kwargs) -> PayPay:
+        kwargs.setdefault("paypay_version", self.paypay_version)
+        kwargs.setdefault("version_resolver", self.version_resolver)
+        kwargs.setdefault("proxy_conf", self.proxy_conf)
+        paypay = PayPay(access_token, transport=self.transport, **kwargs)
+
+        with self._lock:
+            if key == None:
+                key = len(self._keys)
+            if key in self.accounts:
+                raise PayPayError(None, f"アカウント{key}は既に登録されています")
+            self.accounts[key] = paypay
+            self._keys.append(key)
+            self._load[key] = 0
+
+        return paypay
+
+    def remove(self, key) -> PayPay:
+        with self._lock:
+            paypay = self.accounts.pop(key)
+            self._keys.remove(key)
+            del self._load[key]
+
+        return paypay
+
+    def pick(self, key = None):
+        with self._lock:
+            if len(self._keys) == 0:
+                raise PayPayError(None, "アカウントが登録されていません")
+
+            if key != None:
+                if not key in self.accounts:
+                    key = self._keys[zlib.crc32(str(key).encode()) % len(self._keys)]
+            elif self.strategy == "least_loaded":
+                key = min(self._keys, key=self._load.__getitem__)
+            else:
+                key = self._keys[self._cursor % len(self._keys)]
+                self._cursor += 1
+
+            self._load[key] += 1
+
+        return key
+
+    def release(self, key) -> None:
+        with self._lock:
+            if key in self._load:
+                self._load[key] -= 1
+
+    def call(self, method: str, *args, account = None, **kwargs):
+        key = self.pick(account)
+        try:
+            return getattr(self.accounts[key], method)(*args, **kwargs)
+        finally:
+            self.release(key)
+
+    def call_all(self, method: str, *args, **kwargs) -> dict:
+        keys = list(self.accounts)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(keys), 1))) as executor:
+            futures = {key: executor.submit(self.call, method, *args, account=key, **kwargs) for key in keys}
+
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except Exception as error:
+                results[key] = error
+
+        return results
+
+    def get_balances(self) -> dict:
+        return self.call_all("get_balance")
+
+    def get_profiles(self) -> dict:
+        return self.call_all("get_profile")
+
+    def close(self) -> None:
+        if self._owns_transport:
+            self.transport.close()
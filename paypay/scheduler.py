@@ -0,0 +1,227 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import time
+import queue
+import inspect
+import functools
+import itertools
+import threading
+
+from concurrent.futures import Future
+
+from .paypay import LinkBudget, history_page, link_calls, link_password
+
+URGENT = 0
+NORMAL = 1
+BACKGROUND = 2
+
+PRIORITIES = {
+    "accept_link": URGENT,
+    "reject_link": URGENT,
+    "create_link": URGENT,
+    "login_refresh": URGENT,
+    "get_history": BACKGROUND
+}
+
+HOSTS = {
+    "login_start": "www.paypay.ne.jp",
+    "login_confirm": "www.paypay.ne.jp"
+}
+DEFAULT_HOST = "app4.paypay.ne.jp"
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity != None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self) -> float:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+class Scheduler:
+    def __init__(self, workers: int = 8, account_rate: float = None, account_burst: float = None, host_rate: float = None, host_burst: float = None, priorities: dict = None) -> None:
+        self.account_rate = account_rate
+        self.account_burst = account_burst
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.priorities = dict(PRIORITIES, **(priorities or {}))
+
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._queued = {URGENT: 0, NORMAL: 0, BACKGROUND: 0}
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._throttled = 0.0
+
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def __enter__(self) -> "Scheduler":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def submit(self, paypay, method: str, *args, priority: int = None, **kwargs) -> Future:
+        if self._closed:
+            raise RuntimeError("scheduler is closed")
+        if priority == None:
+            priority = self.priorities.get(method, NORMAL)
+
+        future = Future()
+        with self._lock:
+            self._queued[priority] = self._queued.get(priority, 0) + 1
+        self._queue.put((priority, next(self._sequence), (future, paypay, method, args, kwargs)))
+        return future
+
+    def call(self, paypay, method: str, *args, priority: int = None, **kwargs):
+        return self.submit(paypay, method, *args, priority=priority, **kwargs).result()
+
+    def wrap(self, paypay) -> "ScheduledPayPay":
+        return ScheduledPayPay(self, paypay)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "queued": sum(self._queued.values()),
+                "queued_by_priority": dict(self._queued),
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "throttled_seconds": self._throttled
+            }
+
+    def close(self, wait: bool = True) -> None:
+        self._closed = True
+        for _ in self._workers:
+            self._queue.put((float("inf"), next(self._sequence), None))
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _bucket(self, key, rate: float, burst: float) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket == None:
+                bucket = self._buckets[key] = TokenBucket(rate, burst)
+            return bucket
+
+    def _throttle(self, paypay, method: str) -> None:
+        delay = 0.0
+        if self.host_rate != None:
+            delay += self._bucket(("host", HOSTS.get(method, DEFAULT_HOST)), self.host_rate, self.host_burst).acquire()
+        if self.account_rate != None:
+            delay += self._bucket(("account", id(paypay)), self.account_rate, self.account_burst).acquire()
+
+        if delay > 0:
+            with self._lock:
+                self._throttled += delay
+
+    def _work(self) -> None:
+        while True:
+            priority, _, job = self._queue.get()
+            if job == None:
+                return
+
+            future, paypay, method, args, kwargs = job
+            with self._lock:
+                self._queued[priority] -= 1
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            with self._lock:
+                self._running += 1
+            try:
+                self._throttle(paypay, method)
+                result = getattr(paypay, method)(*args, **kwargs)
+            except BaseException as error:
+                with self._lock:
+                    self._running -= 1
+                    self._failed += 1
+                future.set_exception(error)
+            else:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                future.set_result(result)
+
+class ScheduledPayPay:
+    def __init__(self, scheduler: Scheduler, paypay) -> None:
+        self.scheduler = scheduler
+        self.paypay = paypay
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.paypay, name)
+        if not callable(attribute):
+            return attribute
+        if inspect.isgeneratorfunction(attribute) or inspect.isasyncgenfunction(attribute):
+            raise AttributeError(f"{name} cannot be scheduled as a single job")
+
+        def call(*args, **kwargs):
+            return self.scheduler.call(self.paypay, name, *args, **kwargs)
+
+        return call
+
+    def iter_history(self, size: int = 20, cashback: bool = False, since = None):
+        cursor = None
+        while True:
+            items, cursor = history_page(self.get_history(size, cashback, cursor), since)
+            yield from items
+            if cursor == None:
+                return
+
+    def accept_links(self, codes: list, passwords = None, concurrency: int = 8):
+        return self.paypay._map_links(self._job("accept_link"), [(code, link_password(passwords, code)) for code in codes], concurrency)
+
+    def reject_links(self, codes: list, concurrency: int = 8):
+        return self.paypay._map_links(self._job("reject_link"), [(code,) for code in codes], concurrency)
+
+    def create_links(self, amounts: list, password: str = None, concurrency: int = 8, max_total: int = None, keys: list = None):
+        budget = LinkBudget(max_total)
+        return self.paypay._map_links(self._job("_create_budgeted_link", budget, password, priority=self.scheduler.priorities.get("create_link")), link_calls(amounts, keys), concurrency)
+
+    def _job(self, method: str, *args, priority: int = None):
+        return functools.partial(self.scheduler.call, self.paypay, method, *args, priority=priority)
@@ -0,0 +1,155 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import json
+import sqlite3
+import datetime
+import threading
+
+from .paypay import parse_time
+
+class HistoryStore:
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock, self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS history (
+                    order_id TEXT PRIMARY KEY,
+                    order_type TEXT,
+                    amount INTEGER,
+                    counterparty TEXT,
+                    transaction_at REAL,
+                    cashback INTEGER NOT NULL DEFAULT 0,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS history_transaction_at ON history (transaction_at);
+                CREATE INDEX IF NOT EXISTS history_amount ON history (amount);
+                CREATE INDEX IF NOT EXISTS history_counterparty ON history (counterparty);
+                CREATE INDEX IF NOT EXISTS history_order_type ON history (order_type, transaction_at);
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    name TEXT PRIMARY KEY,
+                    order_id TEXT NOT NULL
+                );
+            """)
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def __contains__(self, order_id: str) -> bool:
+        return self.has_order(order_id)
+
+    def sync(self, paypay, cashback: bool = False, size: int = 50) -> int:
+        name = "cashback" if cashback else "all"
+        with self._lock:
+            row = self.connection.execute("SELECT order_id FROM sync_state WHERE name = ?", (name,)).fetchone()
+
+        newest = None
+        count = 0
+        batch = []
+        for item in paypay.iter_history(size=size, cashback=cashback, since=row["order_id"] if row != None else None):
+            if newest == None:
+                newest = item["orderId"]
+            batch.append(item)
+            if len(batch) >= size:
+                count += self.add(batch, cashback)
+                batch = []
+        count += self.add(batch, cashback)
+
+        if newest != None:
+            with self._lock, self.connection:
+                self.connection.execute("INSERT OR REPLACE INTO sync_state (name, order_id) VALUES (?, ?)", (name, newest))
+
+        return count
+
+    def add(self, items: list, cashback: bool = False) -> int:
+        rows = [
+            (
+                item["orderId"],
+                item.get("orderType"),
+                item.get("amount"),
+                item.get("description"),
+                parse_time(item["transactionAt"]).timestamp() if item.get("transactionAt") else None,
+                int(cashback),
+                json.dumps(item, ensure_ascii=False)
+            )
+            for item in items
+        ]
+        with self._lock, self.connection:
+            before = self.connection.total_changes
+            self.connection.executemany("INSERT OR IGNORE INTO history VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            inserted = self.connection.total_changes - before
+            if cashback:
+                self.connection.executemany("UPDATE history SET cashback = 1 WHERE order_id = ?", [(row[0],) for row in rows])
+        return inserted
+
+    def has_order(self, order_id: str) -> bool:
+        with self._lock:
+            return self.connection.execute("SELECT 1 FROM history WHERE order_id = ?", (order_id,)).fetchone() != None
+
+    def get(self, order_id: str) -> dict:
+        with self._lock:
+            row = self.connection.execute("SELECT data FROM history WHERE order_id = ?", (order_id,)).fetchone()
+        return json.loads(row["data"]) if row != None else None
+
+    def find(self, order_type: str = None, counterparty: str = None, min_amount: int = None, max_amount: int = None, since: datetime.datetime = None, until: datetime.datetime = None, cashback: bool = None, limit: int = None) -> list:
+        conditions = []
+        values = []
+        for condition, value in (
+            ("order_type = ?", order_type),
+            ("counterparty = ?", counterparty),
+            ("amount >= ?", min_amount),
+            ("amount <= ?", max_amount),
+            ("transaction_at >= ?", since.timestamp() if since != None else None),
+            ("transaction_at < ?", until.timestamp() if until != None else None),
+            ("cashback = ?", int(cashback) if cashback != None else None)
+        ):
+            if value != None:
+                conditions.append(condition)
+                values.append(value)
+
+        query = "SELECT data FROM history"
+        if len(conditions) != 0:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY transaction_at DESC"
+        if limit != None:
+            query += " LIMIT ?"
+            values.append(limit)
+
+        with self._lock:
+            rows = self.connection.execute(query, values).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def close(self) -> None:
+        self.connection.close()
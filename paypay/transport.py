@@ -0,0 +1,413 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import time
+import asyncio
+import requests
+import threading
+
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+from .policy import Policy, DEFAULT_POLICY, IDEMPOTENT_ENDPOINTS, default_policies
+from .decoder import Decoder, default_decoder
+from .metrics import RequestEvent, emit
+
+PAYPAY_HOSTS = ("https://app4.paypay.ne.jp", "https://www.paypay.ne.jp")
+TRANSPORT_ERRORS = (requests.ConnectionError, requests.Timeout, ValueError)
+
+def http2_available() -> bool:
+    try:
+        import h2
+    except ImportError:
+        return False
+    return True
+
+def create_policies(policies: dict = None) -> dict:
+    result = default_policies()
+    if policies != None:
+        result.update(policies)
+    return result
+
+class Transport:
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, keep_alive: bool = True, decoder: Decoder = None, policies: dict = None, default_policy: Policy = None, hooks: list = None) -> None:
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._configure(pool_maxsize, keep_alive, decoder, policies, default_policy, hooks)
+
+    def _configure(self, pool_maxsize: int, keep_alive: bool, decoder: Decoder, policies: dict, default_policy: Policy, hooks: list) -> None:
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.decoder = decoder if decoder != None else default_decoder
+        self.policies = create_policies(policies)
+        self.default_policy = default_policy if default_policy != None else DEFAULT_POLICY
+        self.hooks = list(hooks or [])
+        self.transport_errors = TRANSPORT_ERRORS
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.mount("https://", self.adapter)
+        session.mount("http://", self.adapter)
+        return session
+
+    def policy(self, request) -> Policy:
+        return self.policies.get(request.endpoint, self.default_policy)
+
+    def add_hook(self, hook) -> None:
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook) -> None:
+        self.hooks.remove(hook)
+
+    def send(self, session: requests.Session, request, proxies: dict = None):
+        policy = self.policy(request)
+        attempt = 0
+        while True:
+            try:
+                if policy.hedge_after != None and request.endpoint in IDEMPOTENT_ENDPOINTS:
+                    response = self._send_hedged(session, request, proxies, policy)
+                else:
+                    response = self._send(session, request, proxies, policy)
+                if attempt >= policy.retries or not policy.should_retry(response):
+                    return response
+            except self.transport_errors:
+                if attempt >= policy.retries:
+                    raise
+
+            time.sleep(policy.delay(attempt))
+            attempt += 1
+
+    def _send(self, session: requests.Session, request, proxies: dict, policy: Policy):
+        if self.hooks:
+            return self._send_instrumented(session, request, proxies, policy)
+
+        response = self._request(session, request, proxies, policy)
+        if request.decode:
+            return self.decoder.decode(response.content, request.schema)
+        return response
+
+    def _request(self, session: requests.Session, request, proxies: dict, policy: Policy, stream: bool = False) -> requests.Response:
+        headers = request.headers
+        if not self.keep_alive:
+            headers = dict(headers or {}, Connection="close")
+
+        return session.request(
+            request.method,
+            request.url,
+            params=request.params,
+            headers=headers,
+            data=request.data,
+            json=request.json,
+            proxies=proxies,
+            timeout=(policy.connect_timeout, policy.read_timeout),
+            stream=stream
+        )
+
+    def _send_instrumented(self, session: requests.Session, request, proxies: dict, policy: Policy):
+        event = RequestEvent(request)
+        try:
+            response = self._request(session, request, proxies, policy, stream=True)
+            event.http_version = "HTTP/1.0" if response.raw.version == 10 else "HTTP/1.1"
+            event.status = response.status_code
+            body = response.request.body or b""
+            event.bytes_out = len(body.encode() if isinstance(body, str) else body)
+            event.add("wait", response.elapsed.total_seconds())
+
+            start = time.perf_counter()
+            content = response.content
+            event.bytes_in = len(content)
+            event.add("read", time.perf_counter() - start)
+
+            if request.decode:
+                start = time.perf_counter()
+                response = self.decoder.decode(content, request.schema)
+                event.add("decode", time.perf_counter() - start)
+                event.set_result(response)
+        except Exception as exception:
+            emit(self.hooks, event.finish(exception))
+            raise
+
+        emit(self.hooks, event.finish())
+        return response
+
+    def _send_hedged(self, session: requests.Session, request, proxies: dict, policy: Policy):
+        executor = self._hedge_executor()
+        futures = [executor.submit(self._send, session, request, proxies, policy)]
+        done, _ = wait(futures, timeout=policy.hedge_after)
+        if len(done) == 0:
+            futures.append(executor.submit(self._send, session, request, proxies, policy))
+
+        error = None
+        for future in as_completed(futures):
+            try:
+                return future.result()
+            except self.transport_errors as exception:
+                error = exception
+        raise error
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor == None:
+                self._executor = ThreadPoolExecutor(max_workers=self.pool_maxsize * 2)
+            return self._executor
+
+    def prewarm(self, session: requests.Session, hosts: tuple = PAYPAY_HOSTS, connections: int = 1, proxies: dict = None) -> None:
+        if not self.keep_alive:
+            return
+
+        connections = min(connections, self.pool_maxsize)
+        with ThreadPoolExecutor(max_workers=len(hosts) * connections) as executor:
+            for host in hosts:
+                for _ in range(connections):
+                    executor.submit(self._prewarm, session, host, proxies)
+
+    def _prewarm(self, session: requests.Session, host: str, proxies: dict) -> None:
+        try:
+            session.head(host, proxies=proxies).close()
+        except requests.RequestException:
+            pass
+
+    def close(self) -> None:
+        if self._executor != None:
+            self._executor.shutdown(wait=False)
+        self.adapter.close()
+
+class HTTP2Transport(Transport):
+    def __init__(self, max_connections: int = 10, max_keepalive_connections: int = 10, keep_alive: bool = True, proxy: str = None, decoder: Decoder = None, policies: dict = None, default_policy: Policy = None, hooks: list = None, http2: bool = True) -> None:
+        import httpx
+
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections if keep_alive else 0
+        )
+        self.http2 = http2 and http2_available()
+        self.proxy = proxy
+        self.pool = httpx.HTTPTransport(limits=self.limits, proxy=proxy, http2=self.http2)
+        self._configure(max_connections, keep_alive, decoder, policies, default_policy, hooks)
+        self.transport_errors = (httpx.TransportError, ValueError)
+
+    def create_session(self):
+        import httpx
+
+        return httpx.Client(transport=self.pool, follow_redirects=True)
+
+    def send(self, session, request, proxies: dict = None):
+        self._check_proxies(proxies)
+        return super().send(session, request, proxies)
+
+    def _check_proxies(self, proxies: dict) -> None:
+        if proxies != None and proxies.get("https") != self.proxy:
+            raise ValueError("HTTP2Transport cannot switch proxies per request; pass proxy= to HTTP2Transport")
+
+    def _request(self, session, request, proxies: dict, policy: Policy, extensions: dict = None):
+        import httpx
+
+        headers = request.headers
+        if not self.keep_alive:
+            headers = dict(headers or {}, Connection="close")
+
+        return session.request(
+            request.method,
+            request.url,
+            params=request.params,
+            headers=headers,
+            data=request.data,
+            json=request.json,
+            timeout=httpx.Timeout(policy.read_timeout, connect=policy.connect_timeout),
+            extensions=extensions
+        )
+
+    def _send_instrumented(self, session, request, proxies: dict, policy: Policy):
+        event = RequestEvent(request)
+        try:
+            response = self._request(session, request, proxies, policy, extensions={"trace": event.record})
+            event.http_version = response.http_version
+            event.status = response.status_code
+            event.bytes_out = len(response.request.content)
+            event.bytes_in = len(response.content)
+
+            if request.decode:
+                start = time.perf_counter()
+                response = self.decoder.decode(response.content, request.schema)
+                event.add("decode", time.perf_counter() - start)
+                event.set_result(response)
+        except Exception as exception:
+            emit(self.hooks, event.finish(exception))
+            raise
+
+        emit(self.hooks, event.finish())
+        return response
+
+    def prewarm(self, session, hosts: tuple = PAYPAY_HOSTS, connections: int = 1, proxies: dict = None) -> None:
+        self._check_proxies(proxies)
+        super().prewarm(session, hosts, 1 if self.http2 else connections, proxies)
+
+    def _prewarm(self, session, host: str, proxies: dict) -> None:
+        import httpx
+
+        try:
+            session.head(host)
+        except httpx.HTTPError:
+            pass
+
+    def close(self) -> None:
+        if self._executor != None:
+            self._executor.shutdown(wait=False)
+        self.pool.close()
+
+class AsyncTransport:
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20, keep_alive: bool = True, proxy: str = None, decoder: Decoder = None, policies: dict = None, default_policy: Policy = None, hooks: list = None, http2: bool = False) -> None:
+        import httpx
+
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections if keep_alive else 0
+        )
+        self.http2 = http2 and http2_available()
+        self.pool = httpx.AsyncHTTPTransport(limits=self.limits, proxy=proxy, http2=self.http2)
+        self.keep_alive = keep_alive
+        self.decoder = decoder if decoder != None else default_decoder
+        self.policies = create_policies(policies)
+        self.default_policy = default_policy if default_policy != None else DEFAULT_POLICY
+        self.hooks = list(hooks or [])
+        self.transport_errors = (httpx.TransportError, ValueError)
+
+    def create_session(self):
+        import httpx
+
+        return httpx.AsyncClient(transport=self.pool, follow_redirects=True)
+
+    def policy(self, request) -> Policy:
+        return self.policies.get(request.endpoint, self.default_policy)
+
+    def add_hook(self, hook) -> None:
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook) -> None:
+        self.hooks.remove(hook)
+
+    async def send(self, session, request):
+        policy = self.policy(request)
+        attempt = 0
+        while True:
+            try:
+                if policy.hedge_after != None and request.endpoint in IDEMPOTENT_ENDPOINTS:
+                    response = await self._send_hedged(session, request, policy)
+                else:
+                    response = await self._send(session, request, policy)
+                if attempt >= policy.retries or not policy.should_retry(response):
+                    return response
+            except self.transport_errors:
+                if attempt >= policy.retries:
+                    raise
+
+            await asyncio.sleep(policy.delay(attempt))
+            attempt += 1
+
+    async def _send(self, session, request, policy: Policy):
+        if self.hooks:
+            return await self._send_instrumented(session, request, policy)
+
+        response = await self._request(session, request, policy)
+        if request.decode:
+            return self.decoder.decode(response.content, request.schema)
+        return response
+
+    async def _request(self, session, request, policy: Policy, extensions: dict = None):
+        import httpx
+
+        headers = request.headers
+        if not self.keep_alive:
+            headers = dict(headers or {}, Connection="close")
+
+        return await session.request(
+            request.method,
+            request.url,
+            params=request.params,
+            headers=headers,
+            data=request.data,
+            json=request.json,
+            timeout=httpx.Timeout(policy.read_timeout, connect=policy.connect_timeout),
+            extensions=extensions
+        )
+
+    async def _send_instrumented(self, session, request, policy: Policy):
+        event = RequestEvent(request)
+        try:
+            response = await self._request(session, request, policy, extensions={"trace": event.trace})
+            event.http_version = response.http_version
+            event.status = response.status_code
+            event.bytes_out = len(response.request.content)
+            event.bytes_in = len(response.content)
+
+            if request.decode:
+                start = time.perf_counter()
+                response = self.decoder.decode(response.content, request.schema)
+                event.add("decode", time.perf_counter() - start)
+                event.set_result(response)
+        except Exception as exception:
+            emit(self.hooks, event.finish(exception))
+            raise
+
+        emit(self.hooks, event.finish())
+        return response
+
+    async def _send_hedged(self, session, request, policy: Policy):
+        tasks = [asyncio.ensure_future(self._send(session, request, policy))]
+        done, _ = await asyncio.wait(tasks, timeout=policy.hedge_after)
+        if len(done) == 0:
+            tasks.append(asyncio.ensure_future(self._send(session, request, policy)))
+
+        error = None
+        try:
+            for future in asyncio.as_completed(tasks):
+                try:
+                    return await future
+                except self.transport_errors as exception:
+                    error = exception
+        finally:
+            for task in tasks:
+                task.cancel()
+        raise error
+
+    async def prewarm(self, session, hosts: tuple = PAYPAY_HOSTS, connections: int = 1) -> None:
+        if not self.keep_alive:
+            return
+        if self.http2:
+            connections = 1
+
+        await asyncio.gather(*[self._prewarm(session, host) for host in hosts for _ in range(connections)])
+
+    async def _prewarm(self, session, host: str) -> None:
+        import httpx
+
+        try:
+            await session.head(host)
+        except httpx.HTTPError:
+            pass
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
@@ -0,0 +1,153 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import re
+import json
+import time
+import tempfile
+import threading
+import requests
+
+APP_STORE_URL = "https://apps.apple.com/jp/app/paypay-%E3%83%9A%E3%82%A4%E3%83%9A%E3%82%A4/id1435783608"
+SHOEBOX_SCRIPT = re.compile(rb"<script[^>]*\sid=[\"']?shoebox-media-api-cache-apps[\"']?[^>]*>")
+SCRIPT_END = b"</script>"
+APP_STORE_TIMEOUT = (5, 10)
+
+def extract_script(chunks) -> str:
+    buffer = b""
+    searched = 0
+    start = None
+    for chunk in chunks:
+        buffer += chunk
+        if start == None:
+            match = SHOEBOX_SCRIPT.search(buffer, max(0, searched - 512))
+            if match == None:
+                searched = len(buffer)
+                if searched > 4096:
+                    buffer = buffer[-512:]
+                    searched = len(buffer)
+                continue
+            buffer = buffer[match.end():]
+            start = 0
+
+        end = buffer.find(SCRIPT_END, max(0, start - len(SCRIPT_END)))
+        if end != -1:
+            return buffer[:end].decode("utf-8")
+        start = len(buffer)
+
+    return None
+
+def parse_version(script: str) -> str:
+    base_element = json.loads(list(json.loads(script).values())[0])
+    return base_element["d"][0]["attributes"]["platformAttributes"]["ios"]["versionHistory"][0]["versionDisplay"]
+
+def fetch_paypay_version(proxies: dict = None, timeout: tuple = APP_STORE_TIMEOUT) -> str:
+    with requests.get(APP_STORE_URL, proxies=proxies, stream=True, timeout=timeout) as response:
+        script = extract_script(response.iter_content(chunk_size=16384))
+    if script == None:
+        raise ValueError("shoebox-media-api-cache-apps was not found")
+    return parse_version(script)
+
+def default_cache_path() -> str:
+    cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_dir, "paypay.py", "version.json")
+
+class VersionResolver:
+    def __init__(self, cache_path: str = None, ttl: float = 86400, fetcher = fetch_paypay_version) -> None:
+        self.cache_path = cache_path if cache_path != None else default_cache_path()
+        self.ttl = ttl
+        self.fetcher = fetcher
+
+        self.version = None
+        self.fetched_at = 0.0
+
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def is_fresh(self) -> bool:
+        return self.version != None and time.time() - self.fetched_at < self.ttl
+
+    def get(self) -> str:
+        if not self.is_fresh():
+            self._load()
+
+        if self.version == None:
+            with self._lock:
+                if self.version == None:
+                    self.refresh()
+        elif not self.is_fresh():
+            self.refresh_background()
+
+        return self.version
+
+    def refresh(self) -> str:
+        version = self.fetcher()
+        self._store(version, time.time())
+        return version
+
+    def refresh_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        threading.Thread(target=self._refresh_background, daemon=True).start()
+
+    def _refresh_background(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            pass
+        finally:
+            self._refreshing = False
+
+    def _load(self) -> None:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        if not isinstance(cache, dict) or not isinstance(cache.get("version"), str):
+            return
+        if cache.get("fetchedAt", 0) > self.fetched_at:
+            self.version = cache["version"]
+            self.fetched_at = cache["fetchedAt"]
+
+    def _store(self, version: str, fetched_at: float) -> None:
+        self.version = version
+        self.fetched_at = fetched_at
+
+        cache_dir = os.path.dirname(self.cache_path)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump({"version": version, "fetchedAt": fetched_at}, file)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            pass
+
+default_resolver = VersionResolver()
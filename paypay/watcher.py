@@ -0,0 +1,294 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import time
+import queue
+import random
+import asyncio
+import threading
+
+from .models import HistoryEntry
+from .paypay import history_page
+from .scheduler import Scheduler, BACKGROUND
+
+class WatchedAccount:
+    __slots__ = ("key", "paypay", "since", "ready", "interval", "next_poll", "polling", "items")
+
+    def __init__(self, key, paypay, since, interval: float) -> None:
+        self.key = key
+        self.paypay = paypay
+        self.since = since
+        self.ready = since != None
+        self.interval = interval
+        self.next_poll = time.monotonic() + random.random() * interval
+        self.polling = False
+        self.items = []
+
+class PaymentWatcher:
+    def __init__(self, accounts = None, min_interval: float = 2, max_interval: float = 60, backoff: float = 2, cashback: bool = False, size: int = 20, scheduler: Scheduler = None, workers: int = 8) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.cashback = cashback
+        self.size = size
+        self.workers = workers
+
+        self.scheduler = scheduler
+        self._owns_scheduler = False
+        self._accounts = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._thread = None
+
+        if isinstance(accounts, dict):
+            for key, paypay in accounts.items():
+                self.add(paypay, key)
+        elif accounts != None:
+            for paypay in accounts:
+                self.add(paypay)
+
+    def __enter__(self) -> "PaymentWatcher":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __iter__(self):
+        return self.events()
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def add(self, paypay, key = None, since: str = None):
+        if key == None:
+            key = len(self._accounts)
+            while key in self._accounts:
+                key += 1
+        with self._lock:
+            self._accounts[key] = WatchedAccount(key, paypay, since, self.min_interval)
+        self._queue.put(None)
+        return key
+
+    def remove(self, key) -> None:
+        with self._lock:
+            self._accounts.pop(key, None)
+
+    @property
+    def cursors(self) -> dict:
+        with self._lock:
+            return {key: account.since for key, account in self._accounts.items()}
+
+    def run(self, callback, on_error = None) -> None:
+        for key, event in self.events():
+            if isinstance(event, Exception):
+                if on_error != None:
+                    on_error(key, event)
+            else:
+                callback(key, event)
+
+    def start(self, callback, on_error = None) -> threading.Thread:
+        self._thread = threading.Thread(target=self.run, args=(callback, on_error), daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._queue.put(None)
+
+    def close(self) -> None:
+        self.stop()
+        if self._thread != None and self._thread != threading.current_thread():
+            self._thread.join()
+        if self._owns_scheduler:
+            self.scheduler.close(wait=False)
+
+    def events(self):
+        self._stopped = False
+        if self.scheduler == None:
+            self.scheduler = Scheduler(workers=self.workers)
+            self._owns_scheduler = True
+
+        while not self._stopped:
+            for account in self._due():
+                self._fetch(account, None)
+
+            try:
+                event = self._queue.get(timeout=self._wait())
+            except queue.Empty:
+                continue
+            if event != None:
+                yield event
+
+    def _due(self) -> list:
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for account in self._accounts.values():
+                if not account.polling and account.next_poll <= now:
+                    account.polling = True
+                    account.items = []
+                    due.append(account)
+        return due
+
+    def _wait(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            polls = [account.next_poll for account in self._accounts.values() if not account.polling]
+        if len(polls) == 0:
+            return self.max_interval
+        return max(0, min(polls) - now)
+
+    def _fetch(self, account: WatchedAccount, cursor: str) -> None:
+        size = self.size if account.ready else 1
+        future = self.scheduler.submit(account.paypay, "get_history", size, self.cashback, cursor, priority=BACKGROUND)
+        future.add_done_callback(lambda future: self._fetched(account, future))
+
+    def _fetched(self, account: WatchedAccount, future) -> None:
+        try:
+            cursor = self._page(account, future.result())
+        except Exception as error:
+            self._finish(account, error, self._queue.put)
+            return
+
+        if cursor != None:
+            self._fetch(account, cursor)
+        else:
+            self._finish(account, None, self._queue.put)
+
+    def _page(self, account: WatchedAccount, response: dict) -> str:
+        if not account.ready:
+            items = response["payload"].get("paymentInfoList") or []
+            account.since = items[0]["orderId"] if len(items) > 0 else None
+            account.ready = True
+            return None
+
+        items, cursor = history_page(response, account.since)
+        account.items.extend(items)
+        return cursor
+
+    def _finish(self, account: WatchedAccount, error: Exception, put) -> None:
+        items = account.items if error == None else []
+        account.items = []
+        if len(items) > 0:
+            account.since = items[0]["orderId"]
+            account.interval = self.min_interval
+        else:
+            account.interval = min(account.interval * self.backoff, self.max_interval)
+        account.next_poll = time.monotonic() + account.interval
+        account.polling = False
+
+        if not account.key in self._accounts:
+            put(None)
+            return
+
+        if error != None:
+            put((account.key, error))
+        for item in reversed(items):
+            put((account.key, HistoryEntry(item)))
+        put(None)
+
+class AsyncPaymentWatcher(PaymentWatcher):
+    def __init__(self, accounts = None, min_interval: float = 2, max_interval: float = 60, backoff: float = 2, cashback: bool = False, size: int = 20, concurrency: int = 8) -> None:
+        self.concurrency = concurrency
+        self._async_queue = None
+        super().__init__(accounts, min_interval, max_interval, backoff, cashback, size)
+
+    def __aiter__(self):
+        return self.events()
+
+    def __iter__(self):
+        raise TypeError("use async for")
+
+    def add(self, paypay, key = None, since: str = None):
+        key = super().add(paypay, key, since)
+        self._wakeup()
+        return key
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wakeup()
+
+    async def run(self, callback, on_error = None) -> None:
+        async for key, event in self.events():
+            if isinstance(event, Exception):
+                if on_error != None:
+                    await maybe_await(on_error(key, event))
+            else:
+                await maybe_await(callback(key, event))
+
+    def start(self, callback, on_error = None) -> asyncio.Task:
+        self._thread = asyncio.ensure_future(self.run(callback, on_error))
+        return self._thread
+
+    async def close(self) -> None:
+        self.stop()
+        if self._thread != None and self._thread != asyncio.current_task():
+            await self._thread
+
+    async def events(self):
+        self._stopped = False
+        self._async_queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+
+        try:
+            while not self._stopped:
+                for account in self._due():
+                    task = asyncio.ensure_future(self._poll(account, semaphore))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+                try:
+                    event = await asyncio.wait_for(self._async_queue.get(), self._wait())
+                except asyncio.TimeoutError:
+                    continue
+                if event != None:
+                    yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _poll(self, account: WatchedAccount, semaphore: asyncio.Semaphore) -> None:
+        error = None
+        cursor = None
+        async with semaphore:
+            try:
+                while True:
+                    size = self.size if account.ready else 1
+                    cursor = self._page(account, await account.paypay.get_history(size, self.cashback, cursor))
+                    if cursor == None:
+                        break
+            except Exception as exception:
+                error = exception
+        self._finish(account, error, self._async_queue.put_nowait)
+
+    def _wakeup(self) -> None:
+        if self._async_queue != None:
+            self._async_queue.put_nowait(None)
+
+async def maybe_await(result):
+    if asyncio.iscoroutine(result):
+        return await result
+    return result
@@ -0,0 +1,100 @@
+"""
+MIT License
+
+Copyright (c) 2024 Yuki
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import csv
+import json
+
+FIELDS = ("key", "amount", "status", "link", "order_id", "error")
+
+class LinkWriter:
+    def __init__(self, file, format: str = "jsonl", amounts = None) -> None:
+        if not format in ("jsonl", "csv"):
+            raise ValueError("format must be jsonl or csv")
+
+        self.format = format
+        self.amounts = amounts
+        self._owns_file = isinstance(file, str)
+        self.file = open(file, "a", encoding="utf-8", newline="") if self._owns_file else file
+        self.created = 0
+        self.failed = 0
+        self.total = 0
+
+        self._csv = None
+        if format == "csv":
+            self._csv = csv.DictWriter(self.file, fieldnames=FIELDS)
+            if not self._owns_file or self.file.tell() == 0:
+                self._csv.writeheader()
+
+    def __enter__(self) -> "LinkWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(self, key, result, amount: int = None) -> dict:
+        if amount == None:
+            amount = self._amount(key)
+
+        row = {"key": key, "amount": amount, "status": "created", "link": None, "order_id": None, "error": None}
+        if isinstance(result, Exception):
+            row["status"] = "error"
+            row["error"] = str(result)
+            self.failed += 1
+        else:
+            payload = result.get("payload") or {}
+            row["link"] = payload.get("link")
+            row["order_id"] = payload.get("orderId")
+            self.created += 1
+            self.total += amount or 0
+
+        if self._csv != None:
+            self._csv.writerow(row)
+        else:
+            self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.file.flush()
+        return row
+
+    def write_all(self, results) -> dict:
+        for key, result in results:
+            self.write(key, result)
+        return self.summary()
+
+    async def write_all_async(self, results) -> dict:
+        async for key, result in results:
+            self.write(key, result)
+        return self.summary()
+
+    def summary(self) -> dict:
+        return {"created": self.created, "failed": self.failed, "total": self.total}
+
+    def close(self) -> None:
+        if self._owns_file:
+            self.file.close()
+
+    def _amount(self, key) -> int:
+        if isinstance(self.amounts, dict):
+            return self.amounts.get(key)
+        if isinstance(self.amounts, (list, tuple)) and isinstance(key, int) and 0 <= key < len(self.amounts):
+            return self.amounts[key]
+        return None
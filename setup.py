@@ -15,6 +15,11 @@ setup(
     description="PayPay(paypay.ne.jp)用の非公式APIライブラリ",
     long_description=readme,
     requires=requirements,
+    extras_require={
+        "async": ["httpx>=0.26"],
+        "http2": ["httpx[http2]>=0.26"],
+        "fast": ["orjson", "msgspec"]
+    },
     classifiers=[
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python :: 3.9",